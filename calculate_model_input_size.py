@@ -1,16 +1,17 @@
 import os
-import json
 import subprocess
-import glob
-from pathlib import Path
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Dict, Any
 
+from console_llm.core.utils import ast_cache_key, ast_cache_get, ast_cache_put, extract_ast_json, loads_json, read_file_bytes, read_json_file
+
 # --- 설정 (사용자 환경에 맞게 경로를 수정하세요) ---
 
 # 1. swingft 설정 파일 경로
 CONFIG_PATH = './swingft_config.json'
 
-# 2. 분석 결과 (JSON 파일)가 저장된 디렉토리
+# 2. 분석 결과 (results_sensitive.jsonl 또는 이전 형식의 개별 JSON 파일)가 저장된 디렉토리
 OUTPUT_DIR = './output'
 
 # 3. SwiftASTAnalyzer 실행 파일 경로
@@ -24,8 +25,7 @@ def load_project_path_from_config(config_path: str) -> str:
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"설정 파일을 찾을 수 없습니다: {config_path}")
 
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    config = read_json_file(config_path)
 
     if 'project' not in config or 'input' not in config['project']:
         raise KeyError("설정 파일에 'project.input' 경로가 없습니다.")
@@ -33,56 +33,171 @@ def load_project_path_from_config(config_path: str) -> str:
     return config['project']['input']
 
 
+_BASENAME_INDEX_CACHE: Dict[str, Dict[str, List[str]]] = {}
+
+
+def _build_basename_index(root: str) -> Dict[str, List[str]]:
+    """프로젝트 트리를 한 번만 순회하여 파일 이름 -> 경로 목록 인덱스를 만듭니다."""
+    index: Dict[str, List[str]] = {}
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        index.setdefault(entry.name, []).append(entry.path)
+        except OSError as e:
+            print(f"디렉토리 검색 중 오류 발생: {current}: {e}")
+    return index
+
+
+def _get_basename_index(project_root: str) -> Dict[str, List[str]]:
+    """project_root별로 캐시된 파일 이름 인덱스를 반환합니다."""
+    index = _BASENAME_INDEX_CACHE.get(project_root)
+    if index is None:
+        index = _build_basename_index(project_root)
+        _BASENAME_INDEX_CACHE[project_root] = index
+    return index
+
+
 def find_source_file(project_root: str, base_filename: str) -> str | None:
     """프로젝트 루트에서 주어진 이름의 파일을 재귀적으로 찾습니다."""
-    try:
-        # rglob을 사용해 모든 하위 디렉토리에서 파일을 효율적으로 검색
-        matches = list(Path(project_root).rglob(base_filename))
-        if matches:
-            return str(matches[0])  # 첫 번째 일치하는 파일 반환
-    except Exception as e:
-        print(f"파일 검색 중 오류 발생: {e}")
-        return None
-    return None
+    index = _get_basename_index(project_root)
+    return index.get(base_filename, [None])[0]
 
 
 def run_ast_analyzer(swift_file_path: str) -> str | None:
-    """SwiftASTAnalyzer를 실행하고 결과를 문자열로 반환합니다."""
+    """SwiftASTAnalyzer를 실행하고 분석기가 모델에 넘기는 것과 같은 (추출/검증된) JSON 문자열을 반환합니다."""
     if not os.path.exists(AST_ANALYZER_PATH):
         raise FileNotFoundError(f"AST 분석기를 찾을 수 없습니다: {AST_ANALYZER_PATH}")
 
-    command = f'"{AST_ANALYZER_PATH}" "{swift_file_path}"'
+    # ConsoleLLM 분석기와 동일한 AST 캐시를 공유
+    cache_key = ast_cache_key(swift_file_path, AST_ANALYZER_PATH)
+    if cache_key:
+        cached = ast_cache_get(cache_key)
+        if cached is not None:
+            return cached
+
     try:
+        # stdout은 바이너리로 받고, 디코딩은 검증을 마친 JSON 부분에 대해서만 한 번 수행
         process = subprocess.run(
-            command, shell=True, capture_output=True, text=True, encoding='utf-8', timeout=60
+            [AST_ANALYZER_PATH, swift_file_path], capture_output=True, timeout=60
         )
-        return process.stdout.strip() if process.returncode == 0 else None
+        if process.returncode != 0:
+            return None
+        # 분석기와 같은 방식으로 추출/검증된 JSON만 공유 캐시에 저장
+        ast_json = extract_ast_json(process.stdout)
+        if ast_json is None:
+            return None
+        if cache_key:
+            ast_cache_put(cache_key, ast_json)
+        return ast_json
     except Exception as e:
         print(f"AST 분석기 실행 중 오류 발생: {e}")
         return None
 
 
-def get_full_prompt(swift_code: str, ast_json: str) -> str:
-    """실제 모델에 입력될 전체 프롬프트 문자열을 생성합니다."""
-    # 민감도 분석용 시스템 프롬프트 (내용은 실제 프롬프트에 맞춰야 합니다)
-    system_prompt = """You are an expert security code auditor.
+# 민감도 분석용 시스템 프롬프트 (내용은 실제 프롬프트에 맞춰야 합니다)
+SYSTEM_PROMPT = """You are an expert security code auditor.
 Your task is to identify all sensitive identifiers in the provided Swift code and explain your reasoning.
 Analyze both the source code and its corresponding AST symbol information.
 Based on your analysis, provide your response as a JSON object with two keys: "reasoning" and "identifiers".
 Your response must be ONLY the JSON object."""
 
-    # 사용자 프롬프트 템플릿
-    user_prompt = f"""**Swift Source Code:**swift
-{swift_code}
+# 사용자 프롬프트 템플릿 (파일별 코드와 AST 사이에 들어가는 고정 문자열)
+_USER_PFX = "**Swift Source Code:**swift\n"
+_USER_MID = "\n\n\n**AST Symbol Information (JSON):**json\n"
+_USER_SFX = "\n\n\nTask: Perform a security audit on the above Swift code and return ONLY a JSON object with 'reasoning' and 'identifiers' keys. Focus on finding security-sensitive identifiers."
+
+# 파일마다 달라지지 않는 프롬프트 부분의 UTF-8 바이트 크기
+SYSTEM_PROMPT_BYTES = len(SYSTEM_PROMPT.encode('utf-8'))
+USER_PROMPT_TEMPLATE_BYTES = len((_USER_PFX + _USER_MID + _USER_SFX).encode('utf-8'))
+
+
+def get_full_prompt(swift_code: str, ast_json: str) -> str:
+    """실제 모델에 입력될 전체 프롬프트 문자열을 생성합니다."""
+    return "".join((SYSTEM_PROMPT, _USER_PFX, swift_code, _USER_MID, ast_json, _USER_SFX))
+
+
+MEASURE_NO_SOURCE = "no_source"
+MEASURE_AST_FAILED = "ast_failed"
+
+
+# 파일별 분석 결과 (디버그 모드에서 한 줄에 하나씩 저장됨)
+RESULTS_JSONL_NAME = 'results_sensitive.jsonl'
+
 
+def load_analysis_targets(output_dir: str) -> List[Tuple[str, str | None]]:
+    """분석 결과에서 (Swift 파일 이름, 결과에 기록된 원본 경로) 목록을 읽어옵니다.
 
-**AST Symbol Information (JSON):**json
-{ast_json}
+    results_sensitive.jsonl이 있으면 각 줄의 file_path를 사용하고, 없으면 이전 형식의
+    *_sensitive.json 개별 파일 이름에서 Swift 파일 이름을 추정합니다 (원본 경로는 None).
+    """
+    jsonl_path = os.path.join(output_dir, RESULTS_JSONL_NAME)
+    if os.path.isfile(jsonl_path):
+        targets = []
+        with open(jsonl_path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    file_path = loads_json(line).get('file_path')
+                except (ValueError, AttributeError):
+                    continue
+                if file_path:
+                    targets.append((os.path.basename(file_path), file_path))
+        return targets
 
+    # summary 파일은 분석 대상에서 제외
+    try:
+        with os.scandir(output_dir) as it:
+            return [
+                (entry.name.replace('_sensitive.json', '.swift'), None) for entry in it
+                if entry.name.endswith('_sensitive.json')
+                and not entry.name.startswith('summary')
+                and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return []
+
+
+def _measure(swift_filename: str, recorded_path: str | None,
+             project_source_dir: str) -> Tuple[str, float, float, float, str | None]:
+    """분석 결과 하나에 대응하는 원본 Swift 파일의 모델 입력 크기(KB)를 측정합니다.
+
+    Returns:
+        (Swift 파일 이름, 코드 KB, AST KB, 총 입력 KB, 오류) 튜플. 성공 시 오류는 None
+    """
+    # 결과에 기록된 경로가 그대로 있으면 사용, 아니면 프로젝트 디렉토리에서 같은 이름의 파일 검색
+    # (인덱스는 읽기 전용으로 공유)
+    if recorded_path and os.path.isfile(recorded_path):
+        swift_filepath = recorded_path
+    else:
+        swift_filepath = find_source_file(project_source_dir, swift_filename)
+
+    if not swift_filepath:
+        return swift_filename, 0.0, 0.0, 0.0, MEASURE_NO_SOURCE
+
+    try:
+        # 크기 측정에는 바이트 길이만 필요하므로 디코딩 없이 바이너리로 읽음
+        code_bytes = len(read_file_bytes(swift_filepath))
 
-Task: Perform a security audit on the above Swift code and return ONLY a JSON object with 'reasoning' and 'identifiers' keys. Focus on finding security-sensitive identifiers."""
+        ast_json = run_ast_analyzer(swift_filepath)
+        if not ast_json:
+            return swift_filename, 0.0, 0.0, 0.0, MEASURE_AST_FAILED
 
-    return system_prompt + user_prompt
+        # 각 구성요소의 크기를 바이트 단위로 계산 (UTF-8 인코딩 기준) 후 KB로 변환
+        # 전체 프롬프트는 고정 부분의 크기를 더해 계산하므로 따로 만들지 않음
+        ast_bytes = len(ast_json.encode('utf-8'))
+        total_bytes = SYSTEM_PROMPT_BYTES + USER_PROMPT_TEMPLATE_BYTES + code_bytes + ast_bytes
+
+        return swift_filename, code_bytes / 1024, ast_bytes / 1024, total_bytes / 1024, None
+
+    except Exception as e:
+        return swift_filename, 0.0, 0.0, 0.0, str(e)
 
 
 def calculate_size_from_output_files():
@@ -95,57 +210,48 @@ def calculate_size_from_output_files():
         print(f"❗️오류: {e}")
         return
 
-    # output 디렉토리에서 *_sensitive.json 파일 목록 가져오기
-    output_files = glob.glob(os.path.join(OUTPUT_DIR, "*_sensitive.json"))
-
-    # summary 파일은 분석 대상에서 제외
-    analysis_targets = [f for f in output_files if not os.path.basename(f).startswith('summary')]
+    # output 디렉토리에서 분석 결과 목록 가져오기
+    analysis_targets = load_analysis_targets(OUTPUT_DIR)
 
     if not analysis_targets:
-        print(f"❗️분석 대상 파일 없음: '{OUTPUT_DIR}' 디렉토리에서 `*_sensitive.json` 파일을 찾지 못했습니다.")
+        print(f"❗️분석 대상 없음: '{OUTPUT_DIR}' 디렉토리에서 `{RESULTS_JSONL_NAME}` 또는 `*_sensitive.json` 파일을 찾지 못했습니다.")
         return
 
-    print(f"📂 '{OUTPUT_DIR}'의 {len(analysis_targets)}개 결과 파일을 기반으로 원본 소스코드를 분석합니다.")
+    print(f"📂 '{OUTPUT_DIR}'의 {len(analysis_targets)}개 분석 결과를 기반으로 원본 소스코드를 분석합니다.")
     print(f"🔎 소스코드 검색 경로: {project_source_dir}\n")
+    # 프로젝트 트리는 한 번만 순회하고 이후에는 인덱스 조회만 수행
+    _get_basename_index(project_source_dir)
+
     print("-" * 85)
     print(f"{'원본 Swift 파일':<45} | {'코드 (KB)':>10} | {'AST (KB)':>10} | {'총 입력 (KB)':>12}")
     print("-" * 85)
 
     total_input_size_kb = 0
 
-    for json_path in analysis_targets:
-        # JSON 파일 이름에서 원본 Swift 파일 이름 추정
-        swift_filename = os.path.basename(json_path).replace('_sensitive.json', '.swift')
-
-        # 프로젝트 디렉토리에서 원본 Swift 파일 검색
-        swift_filepath = find_source_file(project_source_dir, swift_filename)
-
-        if not swift_filepath:
+    # 파일별 측정은 서로 독립적이므로 AST 분석기 실행과 파일 I/O를 스레드로 겹쳐 처리
+    # (Python 3.14+에서는 buffersize로 동시에 제출되는 작업 수를 워커 수에 비례하게 제한)
+    n_workers = os.cpu_count() or 1
+    swift_filenames = [name for name, _ in analysis_targets]
+    recorded_paths = [path for _, path in analysis_targets]
+    project_dirs = [project_source_dir] * len(analysis_targets)
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        if sys.version_info >= (3, 14):
+            results = executor.map(_measure, swift_filenames, recorded_paths, project_dirs, buffersize=n_workers * 4)
+        else:
+            results = executor.map(_measure, swift_filenames, recorded_paths, project_dirs)
+        measurements = list(results)
+
+    for swift_filename, code_size_kb, ast_size_kb, total_size_kb, error in sorted(measurements, key=lambda m: m[0]):
+        if error == MEASURE_NO_SOURCE:
             print(f"{swift_filename:<45} | {'소스 없음':>10} | {'-':>10} | {'-':>12}")
-            continue
-
-        try:
-            with open(swift_filepath, 'r', encoding='utf-8') as f:
-                swift_code = f.read()
-
-            ast_json = run_ast_analyzer(swift_filepath)
-            if not ast_json:
-                print(f"{swift_filename:<45} | {'✓':>10} | {'AST 실패':>10} | {'-':>12}")
-                continue
-
-            full_prompt = get_full_prompt(swift_code, ast_json)
-
-            # 각 구성요소의 크기를 바이트 단위로 계산 (UTF-8 인코딩 기준) 후 KB로 변환
-            code_size_kb = len(swift_code.encode('utf-8')) / 1024
-            ast_size_kb = len(ast_json.encode('utf-8')) / 1024
-            total_size_kb = len(full_prompt.encode('utf-8')) / 1024
-
+        elif error == MEASURE_AST_FAILED:
+            print(f"{swift_filename:<45} | {'✓':>10} | {'AST 실패':>10} | {'-':>12}")
+        elif error:
+            print(f"{swift_filename:<45} | 오류 발생: {error}")
+        else:
             print(f"{swift_filename:<45} | {code_size_kb:10.2f} | {ast_size_kb:10.2f} | {total_size_kb:12.2f}")
             total_input_size_kb += total_size_kb
 
-        except Exception as e:
-            print(f"{swift_filename:<45} | 오류 발생: {e}")
-
     print("-" * 85)
     print(f"📊 총합: 모델에 입력될 데이터의 전체 크기는 약 {total_input_size_kb:.2f} KB 입니다.")
     print("\n분석이 완료되었습니다.")
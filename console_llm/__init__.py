@@ -2,25 +2,6 @@ __version__ = "1.0.0"
 __author__ = "ConsoleLLM Team"
 __license__ = "MIT"
 
-import sys
-import os
-
-# 패키지 경로 설정
-package_dir = os.path.dirname(os.path.abspath(__file__))
-if package_dir not in sys.path:
-    sys.path.insert(0, package_dir)
-
-try:
-    from .api import ConsoleLLM, quick_exclude_analysis, quick_sensitive_analysis
-    from .core.model_loader import get_model_loader, preload_models
-    from .analyzers import ExcludeAnalyzer, SensitiveAnalyzer
-except ImportError as e:
-    print(f"Warning: Import error in ConsoleLLM: {e}")
-    # Fallback imports
-    ConsoleLLM = None
-    ExcludeAnalyzer = None
-    SensitiveAnalyzer = None
-
 __all__ = [
     'ConsoleLLM',
     'quick_exclude_analysis',
@@ -31,6 +12,32 @@ __all__ = [
     'preload_models'
 ]
 
+# 무거운 모듈(llama_cpp 등)은 처음 접근할 때 로드 (PEP 562)
+_LAZY_ATTRIBUTES = {
+    'ConsoleLLM': '.api',
+    'quick_exclude_analysis': '.api',
+    'quick_sensitive_analysis': '.api',
+    'ExcludeAnalyzer': '.analyzers',
+    'SensitiveAnalyzer': '.analyzers',
+    'get_model_loader': '.core.model_loader',
+    'preload_models': '.core.model_loader',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 def get_version():
     """버전 정보 반환"""
     return __version__
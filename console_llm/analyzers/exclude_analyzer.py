@@ -8,55 +8,33 @@ Exclude 모드 전용 분석기 - save_individual_files 옵션 추가 버전
 """
 
 import os
-import json
-from typing import List, Dict, Any, Optional
+from typing import ClassVar, List, Dict, Any, Optional
 from pathlib import Path
-import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
 
 from ..core.base_analyzer import BaseAnalyzer
 from ..core.model_loader import OptimizedModelLoader
 from ..core.utils import (
     extract_symbol_names_from_exclude_result,
     save_identifiers_to_txt,
-    clean_and_deduplicate_identifiers
+    clean_and_deduplicate_identifiers,
+    read_source_bytes,
+    decode_source,
+    write_json_file,
+    JsonLinesWriter
 )
 
 
-class ExcludeAnalyzer(BaseAnalyzer):
-    """난독화 제외 분석 전용 클래스"""
-
-    def __init__(self, base_model_path: str, lora_path: str = None,
-                 model_loader: Optional[OptimizedModelLoader] = None,
-                 n_ctx: int = 4096, n_gpu_layers: int = 0, n_threads: int = None,
-                 enable_4bit_kv_cache: bool = True):
-        super().__init__(base_model_path, lora_path, model_loader,
-                         n_ctx, n_gpu_layers, n_threads, enable_4bit_kv_cache)
-
-        # AST 분석기 경로 설정
-        current_dir = Path(__file__).parent.parent
-        self.ast_analyzer_path = current_dir / "ast_analyzers" / "exclude" / "SwiftASTAnalyzer"
-
-        print(f"ExcludeAnalyzer 초기화 - AST 분석기: {self.ast_analyzer_path}")
-
-    def create_model_input(self, swift_file_path: str, ast_json: str) -> tuple[str, str]:
-        """
-        난독화 제외 분석용 모델 입력 프롬프트 생성
+# 사용자 프롬프트 템플릿 (파일별 코드와 AST 사이에 들어가는 고정 문자열)
+_USER_PFX = "**Swift Source Code:**swift\n"
+_USER_MID = "\n\n\n**AST Symbol Information (JSON):**json\n"
+_USER_SFX = "\n\n\nTask: Identify which identifiers should be excluded from obfuscation and return ONLY a JSON object with 'reasoning' and 'identifiers' keys. Focus on preserving functionality and external interfaces."
 
-        Args:
-            swift_file_path: Swift 파일 경로
-            ast_json: AST JSON 데이터
 
-        Returns:
-            (system_prompt, user_prompt) 튜플
-        """
-        try:
-            with open(swift_file_path, 'r', encoding='utf-8') as f:
-                swift_code = f.read()
-        except Exception:
-            swift_code = "// Could not read source code"
+class ExcludeAnalyzer(BaseAnalyzer):
+    """난독화 제외 분석 전용 클래스"""
 
-        system_prompt = """You are an expert code obfuscation specialist.
+    # 파일과 무관한 고정 시스템 프롬프트 (파일마다 다시 만들지 않도록 클래스 상수로 보관)
+    _SYSTEM_PROMPT: ClassVar[str] = """You are an expert code obfuscation specialist.
 Your task is to identify which identifiers in the Swift code should be excluded from obfuscation based on the provided AST analysis.
 
 Identifiers that should typically be excluded from obfuscation include:
@@ -78,17 +56,48 @@ Based on your analysis, provide your response as a JSON object with two keys: "r
 
 Your response must be ONLY the JSON object."""
 
-        user_prompt = f"""**Swift Source Code:**swift
-{swift_code}
+    def __init__(self, base_model_path: str, lora_path: str = None,
+                 model_loader: Optional[OptimizedModelLoader] = None,
+                 n_ctx: int = 4096, n_gpu_layers: int = 0, n_threads: int = None,
+                 enable_4bit_kv_cache: bool = True, kv_quant: Optional[str] = None):
+        super().__init__(base_model_path, lora_path, model_loader,
+                         n_ctx, n_gpu_layers, n_threads, enable_4bit_kv_cache, kv_quant)
+
+        # AST 분석기 경로 설정
+        current_dir = Path(__file__).parent.parent
+        self.ast_analyzer_path = current_dir / "ast_analyzers" / "exclude" / "SwiftASTAnalyzer"
+
+        print(f"ExcludeAnalyzer 초기화 - AST 분석기: {self.ast_analyzer_path}")
+
+    def create_model_input(self, swift_file_path: str, ast_json: str,
+                           swift_code: Optional[str] = None) -> tuple[str, str]:
+        """
+        난독화 제외 분석용 모델 입력 프롬프트 생성
 
+        Args:
+            swift_file_path: Swift 파일 경로
+            ast_json: AST JSON 데이터
+            swift_code: 이미 읽은 소스 코드 (없으면 파일에서 읽음)
 
-**AST Symbol Information (JSON):**json
-{ast_json}
+        Returns:
+            (system_prompt, user_prompt) 튜플
+        """
+        if swift_code is None:
+            swift_code = self._read_code(swift_file_path)
+        return self._build_prompt(swift_code, ast_json)
 
+    def _read_code(self, swift_file_path: str) -> str:
+        """Swift 소스 읽기 (AST 분석이 성공한 파일에 대해서만 호출됨)"""
+        try:
+            return decode_source(read_source_bytes(swift_file_path))
+        except Exception:
+            return "// Could not read source code"
 
-Task: Identify which identifiers should be excluded from obfuscation and return ONLY a JSON object with 'reasoning' and 'identifiers' keys. Focus on preserving functionality and external interfaces."""
+    def _build_prompt(self, swift_code: str, ast_json: str) -> tuple[str, str]:
+        """소스 코드와 AST JSON으로 (system_prompt, user_prompt) 구성"""
+        user_prompt = "".join((_USER_PFX, swift_code, _USER_MID, ast_json, _USER_SFX))
 
-        return system_prompt, user_prompt
+        return self._SYSTEM_PROMPT, user_prompt
 
     def analyze_project(self, project_path: str = None, config_path: str = None,
                         output_dir: str = "./output_exclude", max_workers: int = 4,
@@ -101,7 +110,7 @@ Task: Identify which identifiers should be excluded from obfuscation and return
             config_path: swingft_config.json 경로 (선택사항)
             output_dir: 출력 디렉토리
             max_workers: 병렬 처리 워커 수
-            save_individual_files: 개별 JSON 파일 저장 여부
+            save_individual_files: 파일별 결과(results_exclude.jsonl) 저장 여부
 
         Returns:
             분석 결과 요약
@@ -120,42 +129,43 @@ Task: Identify which identifiers should be excluded from obfuscation and return
         os.makedirs(output_dir, exist_ok=True)
 
         # 개별 파일 저장 모드 알림
+        results_path = os.path.join(output_dir, "results_exclude.jsonl")
         if save_individual_files:
-            print(f"Debug mode: 개별 JSON 파일들도 {output_dir}에 저장됩니다.")
-
-        # 병렬 처리 시작 전에 모델을 메인 메모리에 미리 로드합니다.
-        self.preload_model()
+            print(f"Debug mode: 파일별 결과가 {results_path}에 한 줄씩 저장됩니다.")
 
         print(f"\nStarting obfuscation exclusion analysis with {max_workers} workers...")
         results = []
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_file = {
-                executor.submit(self.generate_analysis, swift_file): swift_file
-                for swift_file in swift_files
-            }
-
-            for future in concurrent.futures.as_completed(future_to_file):
-                swift_file = future_to_file[future]
-                try:
-                    result = future.result()
+        # 결과가 도착할 때마다 바로 집계 (개별 파일 저장 모드가 아니면 결과 자체는 보관하지 않음)
+        successful_count = 0
+        failed_count = 0
+        # symbol_name들 (처음 등장한 순서를 유지하며 중복 제거, 전체 개수는 따로 집계)
+        seen_symbol_names: Dict[str, None] = {}
+        total_exclude_identifiers = 0
+
+        def handle_result(swift_file: str, result: Dict[str, Any]) -> None:
+            nonlocal successful_count, failed_count, total_exclude_identifiers
+            base = os.path.basename(swift_file)
+            try:
+                # 파일별 결과를 JSONL에 기록 (조건부, 요약에 포함할 결과도 이때만 보관)
+                if save_individual_files:
                     results.append(result)
-
-                    # 개별 JSON 파일 저장 (조건부)
-                    if save_individual_files:
-                        filename = os.path.basename(swift_file).replace('.swift', '_exclude.json')
-                        output_path = os.path.join(output_dir, filename)
-
-                        with open(output_path, 'w', encoding='utf-8') as f:
-                            json.dump(result, f, ensure_ascii=False, indent=2)
-
-                    if 'error' in result:
-                        print(f"✗ {os.path.basename(swift_file)}: {result['error']}")
-                    else:
-                        print(f"✓ {os.path.basename(swift_file)}: {len(result['identifiers'])} exclusion identifiers")
-
-                except Exception as e:
-                    print(f"✗ {os.path.basename(swift_file)}: Exception - {e}")
+                    writer.write_json(result)
+
+                if 'error' in result:
+                    failed_count += 1
+                    print(f"✗ {base}: {result['error']}")
+                else:
+                    successful_count += 1
+                    symbol_names = extract_symbol_names_from_exclude_result(result)
+                    total_exclude_identifiers += len(symbol_names)
+                    seen_symbol_names.update(dict.fromkeys(symbol_names))
+                    print(f"✓ {base}: {len(result['identifiers'])} exclusion identifiers")
+
+            except Exception as e:
+                print(f"✗ {base}: Exception - {e}")
+                failed_count += 1
+                if save_individual_files:
                     results.append({
                         "file_path": swift_file,
                         "error": str(e),
@@ -163,31 +173,27 @@ Task: Identify which identifiers should be excluded from obfuscation and return
                         "identifiers": []
                     })
 
-        successful_results = [r for r in results if 'error' not in r]
-        failed_results = [r for r in results if 'error' in r]
-
-        # symbol_name들 추출
-        all_symbol_names = []
-        for result in successful_results:
-            symbol_names = extract_symbol_names_from_exclude_result(result)
-            all_symbol_names.extend(symbol_names)
+        # 파일별 결과는 하나의 JSONL 파일에 백그라운드 스레드가 기록하여 파이프라인을 막지 않음
+        writer = JsonLinesWriter(results_path) if save_individual_files else None
+        try:
+            self.run_pipeline(swift_files, max_workers, handle_result)
+        finally:
+            if writer is not None:
+                writer.close()
 
         # 중복 제거하고 정렬
-        unique_symbol_names = clean_and_deduplicate_identifiers(all_symbol_names)
+        unique_symbol_names = clean_and_deduplicate_identifiers(seen_symbol_names)
 
         # exclude_id.txt 파일로 저장 (항상 생성)
         exclude_txt_path = os.path.join(output_dir, "exclude_id.txt")
         save_identifiers_to_txt(unique_symbol_names, exclude_txt_path)
 
-        # 기존 통계 계산 (호환성 유지)
-        total_exclude_identifiers = len(all_symbol_names)
-
         # 요약 결과 (save_individual_files가 False면 results 제외)
         summary = {
             "mode": "exclude",
             "files_analyzed": len(swift_files),
-            "successful": len(successful_results),
-            "failed": len(failed_results),
+            "successful": successful_count,
+            "failed": failed_count,
             "total_exclude_identifiers_found": total_exclude_identifiers,
             "unique_exclude_identifiers": unique_symbol_names,
         }
@@ -198,19 +204,18 @@ Task: Identify which identifiers should be excluded from obfuscation and return
 
         # summary 저장 (항상 생성)
         summary_path = os.path.join(output_dir, "summary_exclude.json")
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+        write_json_file(summary, summary_path)
 
         print(f"\n=== Exclude Analysis Complete ===")
         print(f"Files processed: {len(swift_files)}")
-        print(f"Successful: {len(successful_results)}")
-        print(f"Failed: {len(failed_results)}")
+        print(f"Successful: {successful_count}")
+        print(f"Failed: {failed_count}")
         print(f"Total exclusion identifiers found: {total_exclude_identifiers}")
         print(f"Unique exclusion identifiers: {len(unique_symbol_names)}")
         print(f"Results saved to: {output_dir}")
         print(f"Identifiers saved to: {exclude_txt_path}")
 
         if save_individual_files:
-            print(f"개별 JSON 파일들도 저장되었습니다.")
+            print(f"File results saved to: {results_path}")
 
         return summary
\ No newline at end of file
@@ -8,30 +8,60 @@ Sensitive 모드 전용 분석기 - save_individual_files 옵션 추가 버전
 """
 
 import os
-import json
-from typing import List, Dict, Any, Optional
+from typing import ClassVar, List, Dict, Any, Optional, Set
 from pathlib import Path
-import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
 
 from ..core.base_analyzer import BaseAnalyzer
 from ..core.model_loader import OptimizedModelLoader
 from ..core.utils import (
     extract_sensitive_identifiers,
     save_identifiers_to_txt,
-    clean_and_deduplicate_identifiers
+    build_identifier_matcher,
+    ast_references_identifiers,
+    clean_and_deduplicate_identifiers,
+    read_source_bytes,
+    decode_source,
+    write_json_file,
+    JsonLinesWriter
 )
 
 
+# 사용자 프롬프트 템플릿 (파일별 코드와 AST 사이에 들어가는 고정 문자열)
+_USER_PFX = "**Swift Source Code:**swift\n"
+_USER_MID = "\n\n\n**AST Symbol Information (JSON):**json\n"
+_USER_SFX = "\n\n\nTask: Perform a security audit on the above Swift code and return ONLY a JSON object with 'reasoning' and 'identifiers' keys. Focus on finding security-sensitive identifiers."
+
+
 class SensitiveAnalyzer(BaseAnalyzer):
     """보안 취약점 분석 전용 클래스"""
 
+    # 파일과 무관한 고정 시스템 프롬프트 (파일마다 다시 만들지 않도록 클래스 상수로 보관)
+    _SYSTEM_PROMPT: ClassVar[str] = """You are an expert security code auditor.
+Your task is to identify all sensitive identifiers in the provided Swift code and explain your reasoning.
+Analyze both the source code and its corresponding AST symbol information.
+
+Focus on identifying:
+- Security-sensitive functions (authentication, encryption, data storage)
+- API keys, tokens, passwords, or sensitive data variables
+- Network communication functions that handle sensitive data
+- Database operations with sensitive information
+- Keychain operations
+- Biometric authentication functions
+- Any identifiers that could expose security vulnerabilities
+
+Based on your analysis, provide your response as a JSON object with two keys: "reasoning" and "identifiers".
+
+"reasoning": A step-by-step explanation of why the identified identifiers are considered sensitive. For secure code, explain why it is safe.
+"identifiers": A JSON list of strings containing only the base name of each sensitive identifier. For secure code, this should be an empty list [].
+
+Your response must be ONLY the JSON object."""
+
     def __init__(self, base_model_path: str, lora_path: str = None,
                  model_loader: Optional[OptimizedModelLoader] = None,
                  n_ctx: int = 4096, n_gpu_layers: int = 0, n_threads: int = None,
-                 enable_4bit_kv_cache: bool = True):
+                 enable_4bit_kv_cache: bool = True, kv_quant: Optional[str] = None):
         super().__init__(base_model_path, lora_path, model_loader,
-                         n_ctx, n_gpu_layers, n_threads, enable_4bit_kv_cache)
+                         n_ctx, n_gpu_layers, n_threads, enable_4bit_kv_cache, kv_quant)
 
         # AST 분석기 경로 설정
         current_dir = Path(__file__).parent.parent
@@ -39,58 +69,40 @@ class SensitiveAnalyzer(BaseAnalyzer):
 
         print(f"SensitiveAnalyzer 초기화 - AST 분석기: {self.ast_analyzer_path}")
 
-    def create_model_input(self, swift_file_path: str, ast_json: str) -> tuple[str, str]:
+    def create_model_input(self, swift_file_path: str, ast_json: str,
+                           swift_code: Optional[str] = None) -> tuple[str, str]:
         """
         보안 분석용 모델 입력 프롬프트 생성
 
         Args:
             swift_file_path: Swift 파일 경로
             ast_json: AST JSON 데이터
+            swift_code: 이미 읽은 소스 코드 (없으면 파일에서 읽음)
 
         Returns:
             (system_prompt, user_prompt) 튜플
         """
+        if swift_code is None:
+            swift_code = self._read_code(swift_file_path)
+        return self._build_prompt(swift_code, ast_json)
+
+    def _read_code(self, swift_file_path: str) -> str:
+        """Swift 소스 읽기 (AST 분석이 성공한 파일에 대해서만 호출됨)"""
         try:
-            with open(swift_file_path, 'r', encoding='utf-8') as f:
-                swift_code = f.read()
+            return decode_source(read_source_bytes(swift_file_path))
         except Exception:
-            swift_code = "// Could not read source code"
+            return "// Could not read source code"
 
-        system_prompt = """You are an expert security code auditor.
-Your task is to identify all sensitive identifiers in the provided Swift code and explain your reasoning.
-Analyze both the source code and its corresponding AST symbol information.
+    def _build_prompt(self, swift_code: str, ast_json: str) -> tuple[str, str]:
+        """소스 코드와 AST JSON으로 (system_prompt, user_prompt) 구성"""
+        user_prompt = "".join((_USER_PFX, swift_code, _USER_MID, ast_json, _USER_SFX))
 
-Focus on identifying:
-- Security-sensitive functions (authentication, encryption, data storage)
-- API keys, tokens, passwords, or sensitive data variables
-- Network communication functions that handle sensitive data
-- Database operations with sensitive information
-- Keychain operations
-- Biometric authentication functions
-- Any identifiers that could expose security vulnerabilities
-
-Based on your analysis, provide your response as a JSON object with two keys: "reasoning" and "identifiers".
-
-"reasoning": A step-by-step explanation of why the identified identifiers are considered sensitive. For secure code, explain why it is safe.
-"identifiers": A JSON list of strings containing only the base name of each sensitive identifier. For secure code, this should be an empty list [].
-
-Your response must be ONLY the JSON object."""
-
-        user_prompt = f"""**Swift Source Code:**swift
-{swift_code}
-
-
-**AST Symbol Information (JSON):**json
-{ast_json}
-
-
-Task: Perform a security audit on the above Swift code and return ONLY a JSON object with 'reasoning' and 'identifiers' keys. Focus on finding security-sensitive identifiers."""
-
-        return system_prompt, user_prompt
+        return self._SYSTEM_PROMPT, user_prompt
 
     def analyze_project(self, project_path: str = None, config_path: str = None,
                         output_dir: str = "./output_sensitive", max_workers: int = 4,
-                        save_individual_files: bool = False) -> Dict[str, Any]:
+                        save_individual_files: bool = False,
+                        skip_unreferenced_files: bool = False) -> Dict[str, Any]:
         """
         전체 프로젝트 보안 분석
 
@@ -99,7 +111,9 @@ Task: Perform a security audit on the above Swift code and return ONLY a JSON ob
             config_path: swingft_config.json 경로 (선택사항)
             output_dir: 출력 디렉토리
             max_workers: 병렬 처리 워커 수
-            save_individual_files: 개별 JSON 파일 저장 여부
+            save_individual_files: 파일별 결과(results_sensitive.jsonl) 저장 여부
+            skip_unreferenced_files: 대상 식별자가 AST 심볼/참조에 없으면 모델 추론 생략
+                (주석 등에만 등장하는 파일을 건너뜀, config에 대상 식별자가 있을 때만 적용)
 
         Returns:
             분석 결과 요약
@@ -132,42 +146,42 @@ Task: Perform a security audit on the above Swift code and return ONLY a JSON ob
         os.makedirs(output_dir, exist_ok=True)
 
         # 개별 파일 저장 모드 알림
+        results_path = os.path.join(output_dir, "results_sensitive.jsonl")
         if save_individual_files:
-            print(f"Debug mode: 개별 JSON 파일들도 {output_dir}에 저장됩니다.")
-
-        # 병렬 처리 시작 전에 모델을 메인 메모리에 미리 로드합니다.
-        self.preload_model()
+            print(f"Debug mode: 파일별 결과가 {results_path}에 한 줄씩 저장됩니다.")
 
         print(f"\nStarting security analysis with {max_workers} workers...")
         results = []
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_file = {
-                executor.submit(self.generate_analysis, swift_file): swift_file
-                for swift_file in swift_files
-            }
-
-            for future in concurrent.futures.as_completed(future_to_file):
-                swift_file = future_to_file[future]
-                try:
-                    result = future.result()
+        # 결과가 도착할 때마다 바로 집계 (개별 파일 저장 모드가 아니면 결과 자체는 보관하지 않음)
+        successful_count = 0
+        failed_count = 0
+        seen_identifiers: Set[str] = set()
+        total_sensitive_identifiers = 0
+
+        def handle_result(swift_file: str, result: Dict[str, Any]) -> None:
+            nonlocal successful_count, failed_count, total_sensitive_identifiers
+            base = os.path.basename(swift_file)
+            try:
+                # 파일별 결과를 JSONL에 기록 (조건부, 요약에 포함할 결과도 이때만 보관)
+                if save_individual_files:
                     results.append(result)
-
-                    # 개별 JSON 파일 저장 (조건부)
-                    if save_individual_files:
-                        filename = os.path.basename(swift_file).replace('.swift', '_sensitive.json')
-                        output_path = os.path.join(output_dir, filename)
-
-                        with open(output_path, 'w', encoding='utf-8') as f:
-                            json.dump(result, f, ensure_ascii=False, indent=2)
-
-                    if 'error' in result:
-                        print(f"✗ {os.path.basename(swift_file)}: {result['error']}")
-                    else:
-                        print(f"✓ {os.path.basename(swift_file)}: {len(result['identifiers'])} sensitive identifiers")
-
-                except Exception as e:
-                    print(f"✗ {os.path.basename(swift_file)}: Exception - {e}")
+                    writer.write_json(result)
+
+                if 'error' in result:
+                    failed_count += 1
+                    print(f"✗ {base}: {result['error']}")
+                else:
+                    successful_count += 1
+                    identifiers = extract_sensitive_identifiers(result)
+                    total_sensitive_identifiers += len(identifiers)
+                    seen_identifiers.update(identifiers)
+                    print(f"✓ {base}: {len(result['identifiers'])} sensitive identifiers")
+
+            except Exception as e:
+                print(f"✗ {base}: Exception - {e}")
+                failed_count += 1
+                if save_individual_files:
                     results.append({
                         "file_path": swift_file,
                         "error": str(e),
@@ -175,31 +189,33 @@ Task: Perform a security audit on the above Swift code and return ONLY a JSON ob
                         "identifiers": []
                     })
 
-        successful_results = [r for r in results if 'error' not in r]
-        failed_results = [r for r in results if 'error' in r]
+        # AST 사전 필터 (선택)
+        ast_filter = None
+        if skip_unreferenced_files and target_identifiers:
+            contains_identifier = build_identifier_matcher(target_identifiers)
+            ast_filter = lambda ast_json: ast_references_identifiers(ast_json, contains_identifier)
 
-        # identifiers 추출 및 함수명 정리
-        all_sensitive_identifiers = []
-        for result in successful_results:
-            identifiers = extract_sensitive_identifiers(result)
-            all_sensitive_identifiers.extend(identifiers)
+        # 파일별 결과는 하나의 JSONL 파일에 백그라운드 스레드가 기록하여 파이프라인을 막지 않음
+        writer = JsonLinesWriter(results_path) if save_individual_files else None
+        try:
+            self.run_pipeline(swift_files, max_workers, handle_result, ast_filter)
+        finally:
+            if writer is not None:
+                writer.close()
 
-        # 중복 제거하고 정렬
-        unique_sensitive_identifiers = clean_and_deduplicate_identifiers(all_sensitive_identifiers)
+        # 함수명 정리 후 중복 제거하고 정렬
+        unique_sensitive_identifiers = clean_and_deduplicate_identifiers(seen_identifiers)
 
         # sensitive_id.txt 파일로 저장 (항상 생성)
         sensitive_txt_path = os.path.join(output_dir, "sensitive_id.txt")
         save_identifiers_to_txt(unique_sensitive_identifiers, sensitive_txt_path)
 
-        # 기존 통계 계산 (호환성 유지)
-        total_sensitive_identifiers = len(all_sensitive_identifiers)
-
         # 요약 결과 (save_individual_files가 False면 results 제외)
         summary = {
             "mode": "sensitive",
             "files_analyzed": len(swift_files),
-            "successful": len(successful_results),
-            "failed": len(failed_results),
+            "successful": successful_count,
+            "failed": failed_count,
             "total_sensitive_identifiers_found": total_sensitive_identifiers,
             "unique_sensitive_identifiers": unique_sensitive_identifiers,
         }
@@ -210,19 +226,18 @@ Task: Perform a security audit on the above Swift code and return ONLY a JSON ob
 
         # summary 저장 (항상 생성)
         summary_path = os.path.join(output_dir, "summary_sensitive.json")
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+        write_json_file(summary, summary_path)
 
         print(f"\n=== Security Analysis Complete ===")
         print(f"Files processed: {len(swift_files)}")
-        print(f"Successful: {len(successful_results)}")
-        print(f"Failed: {len(failed_results)}")
+        print(f"Successful: {successful_count}")
+        print(f"Failed: {failed_count}")
         print(f"Total sensitive identifiers found: {total_sensitive_identifiers}")
         print(f"Unique sensitive identifiers: {len(unique_sensitive_identifiers)}")
         print(f"Results saved to: {output_dir}")
         print(f"Identifiers saved to: {sensitive_txt_path}")
 
         if save_individual_files:
-            print(f"개별 JSON 파일들도 저장되었습니다.")
+            print(f"File results saved to: {results_path}")
 
         return summary
\ No newline at end of file
@@ -8,13 +8,18 @@ ConsoleLLM 프로그래밍 API - 외부에서 쉽게 사용할 수 있는 인터
 """
 
 import os
-from typing import Dict, Any, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Literal, Optional
 from pathlib import Path
 
-from .core.model_loader import get_model_loader, preload_models
+from .core.model_loader import get_model_loader, preload_models, resolve_kv_quant
+from .core.utils import format_file_size
 from .analyzers.exclude_analyzer import ExcludeAnalyzer
 from .analyzers.sensitive_analyzer import SensitiveAnalyzer
 
+# 백그라운드 모델 프리로드 전용 실행기 (모델 로드는 한 번에 하나씩)
+_preload_executor = ThreadPoolExecutor(max_workers=1)
+
 
 class ConsoleLLM:
     """ConsoleLLM 메인 API 클래스"""
@@ -27,6 +32,7 @@ class ConsoleLLM:
                  n_gpu_layers: int = 0,
                  n_threads: Optional[int] = None,
                  enable_4bit_kv_cache: bool = True,
+                 kv_quant: Optional[Literal["q4_0", "q8_0", "f16"]] = None,
                  auto_preload: bool = True):
         """
         ConsoleLLM 초기화
@@ -39,7 +45,8 @@ class ConsoleLLM:
             n_gpu_layers: GPU 레이어 수
             n_threads: CPU 스레드 수
             enable_4bit_kv_cache: 4비트 KV 캐시 활성화
-            auto_preload: 초기화 시 모델 자동 로드
+            kv_quant: KV 캐시 타입 ("q4_0", "q8_0", "f16", 미지정 시 enable_4bit_kv_cache 기준)
+            auto_preload: 초기화 시 백그라운드에서 모델 자동 로드 (False면 분석 중 응답 캐시에 없는 첫 파일에서 로드)
         """
         self.base_model_path = base_model_path
         self.lora_exclude_path = lora_exclude_path
@@ -48,15 +55,19 @@ class ConsoleLLM:
             "n_ctx": n_ctx,
             "n_gpu_layers": n_gpu_layers,
             "n_threads": n_threads,
-            "enable_4bit_kv_cache": enable_4bit_kv_cache
+            "enable_4bit_kv_cache": enable_4bit_kv_cache,
+            "kv_quant": resolve_kv_quant(kv_quant, enable_4bit_kv_cache)
         }
 
         # 파일 존재 확인
         self._validate_files()
 
-        # 자동 모델 로드
+        # 자동 모델 로드 (백그라운드에서 진행, 그동안 호출자는 프로젝트 탐색 등을 계속할 수 있음)
+        # 분석기는 같은 모델 로더의 잠금을 통해 로드가 끝날 때까지 기다린 뒤 캐시된 모델을 사용
+        self._preload_future: Optional[Future] = None
         if auto_preload:
-            self.preload_models()
+            self._preload_future = _preload_executor.submit(self.preload_models)
+            self._preload_future.add_done_callback(self._on_preload_done)
 
     def _validate_files(self):
         """필요한 파일들의 존재 확인"""
@@ -69,6 +80,17 @@ class ConsoleLLM:
         if self.lora_sensitive_path and not os.path.exists(self.lora_sensitive_path):
             raise FileNotFoundError(f"Sensitive LoRA not found: {self.lora_sensitive_path}")
 
+    def _on_preload_done(self, future: Future):
+        """백그라운드 프리로드 실패 알림 (분석 시점에 분석기가 다시 로드를 시도함)"""
+        error = future.exception()
+        if error is not None:
+            print(f"Warning: Background model pre-loading failed: {error}")
+
+    def wait_for_preload(self):
+        """백그라운드 모델 프리로드가 끝날 때까지 대기 (실패 시 예외 전달)"""
+        if self._preload_future is not None:
+            self._preload_future.result()
+
     def preload_models(self):
         """모델들을 미리 메모리에 로드"""
         preload_models(
@@ -92,7 +114,7 @@ class ConsoleLLM:
             config_path: swingft_config.json 경로 (선택사항)
             output_dir: 출력 디렉토리
             max_workers: 병렬 처리 워커 수
-            save_individual_files: 개별 JSON 파일 저장 여부
+            save_individual_files: 파일별 결과(results_*.jsonl) 저장 여부
 
         Returns:
             분석 결과
@@ -130,7 +152,8 @@ class ConsoleLLM:
                           config_path: Optional[str] = None,
                           output_dir: Optional[str] = None,
                           max_workers: int = 4,
-                          save_individual_files: bool = False) -> Dict[str, Any]:
+                          save_individual_files: bool = False,
+                          skip_unreferenced_files: bool = False) -> Dict[str, Any]:
         """
         Sensitive 모드 분석 실행
 
@@ -139,7 +162,8 @@ class ConsoleLLM:
             config_path: swingft_config.json 경로 (선택사항)
             output_dir: 출력 디렉토리
             max_workers: 병렬 처리 워커 수
-            save_individual_files: 개별 JSON 파일 저장 여부
+            save_individual_files: 파일별 결과(results_*.jsonl) 저장 여부
+            skip_unreferenced_files: AST에 대상 식별자 참조가 없는 파일은 모델 추론 생략
 
         Returns:
             분석 결과
@@ -169,7 +193,8 @@ class ConsoleLLM:
             config_path=config_path,
             output_dir=output_dir,
             max_workers=max_workers,
-            save_individual_files=save_individual_files
+            save_individual_files=save_individual_files,
+            skip_unreferenced_files=skip_unreferenced_files
         )
 
     def analyze_both(self,
@@ -186,7 +211,7 @@ class ConsoleLLM:
             config_path: swingft_config.json 경로 (선택사항)
             output_base_dir: 기본 출력 디렉토리
             max_workers: 병렬 처리 워커 수
-            save_individual_files: 개별 JSON 파일 저장 여부
+            save_individual_files: 파일별 결과(results_*.jsonl) 저장 여부
 
         Returns:
             {'exclude': exclude_results, 'sensitive': sensitive_results}
@@ -239,7 +264,7 @@ class ConsoleLLM:
             config_paths: 설정 파일 경로 리스트 (project_paths와 매칭)
             output_base_dir: 기본 출력 디렉토리
             max_workers: 병렬 처리 워커 수
-            save_individual_files: 개별 JSON 파일 저장 여부
+            save_individual_files: 파일별 결과(results_*.jsonl) 저장 여부
 
         Returns:
             각 프로젝트별 분석 결과
@@ -285,13 +310,19 @@ class ConsoleLLM:
         get_model_loader().clear_cache()
 
     def get_model_info(self) -> Dict[str, Any]:
-        """현재 설정 정보 반환"""
+        """현재 설정 정보 반환 (로드된 모델별 KV 캐시 추정 메모리 포함)"""
+        kv_cache = get_model_loader().get_kv_cache_info()
+        for info in kv_cache.values():
+            kv_bytes = info["kv_cache_bytes"]
+            info["kv_cache_size"] = format_file_size(kv_bytes) if kv_bytes is not None else "unknown"
+
         return {
             "base_model_path": self.base_model_path,
             "lora_exclude_path": self.lora_exclude_path,
             "lora_sensitive_path": self.lora_sensitive_path,
             "model_config": self.model_config,
-            "cached_models": get_model_loader().get_cached_models()
+            "cached_models": get_model_loader().get_cached_models(),
+            "kv_cache": kv_cache
         }
 
 
@@ -307,7 +338,7 @@ def quick_exclude_analysis(base_model_path: str,
         base_model_path=base_model_path,
         lora_exclude_path=lora_exclude_path,
         lora_sensitive_path=None,
-        auto_preload=True
+        auto_preload=False
     )
     return analyzer.analyze_exclude(project_path, config_path, output_dir, save_individual_files=save_individual_files)
 
@@ -323,6 +354,6 @@ def quick_sensitive_analysis(base_model_path: str,
         base_model_path=base_model_path,
         lora_exclude_path=None,
         lora_sensitive_path=lora_sensitive_path,
-        auto_preload=True
+        auto_preload=False
     )
     return analyzer.analyze_sensitive(project_path, config_path, output_dir, save_individual_files=save_individual_files)
\ No newline at end of file
@@ -10,9 +10,6 @@ ConsoleLLM CLI 인터페이스
 import argparse
 import sys
 import os
-from pathlib import Path
-
-from .api import ConsoleLLM
 
 
 def main():
@@ -48,7 +45,7 @@ def main():
 
     # 디버깅 옵션 추가
     parser.add_argument("--debug", action='store_true',
-                        help="디버깅용 개별 JSON 파일들도 저장")
+                        help="디버깅용 파일별 결과(results_*.jsonl)도 저장")
 
     # 모델 설정
     parser.add_argument("--ctx", type=int, default=4096,
@@ -61,6 +58,8 @@ def main():
                         help="4비트 KV 캐시 활성화 (기본값: True)")
     parser.add_argument("--disable_4bit_kv_cache", action='store_true',
                         help="4비트 KV 캐시 비활성화")
+    parser.add_argument("--kv_cache_type", type=str, choices=['q4_0', 'q8_0', 'f16'], default=None,
+                        help="KV 캐시 타입 (지정 시 4비트 KV 캐시 옵션보다 우선)")
 
     args = parser.parse_args()
 
@@ -77,17 +76,21 @@ def main():
         print(f"Error: 프로젝트 경로가 디렉토리가 아닙니다: {args.project}", file=sys.stderr)
         sys.exit(1)
 
-    # Swift 파일이 있는지 확인
-    swift_files = []
-    for root, dirs, files in os.walk(args.project):
-        swift_files.extend([f for f in files if f.endswith('.swift')])
+    # 무거운 모듈(llama_cpp 등)은 인자 파싱과 경로 확인이 끝난 뒤에 로드 (--help, 인자 오류 시 빠르게 종료)
+    try:
+        from .api import ConsoleLLM
+        from .core.utils import has_swift_files
+    except ImportError as e:
+        print(f"Error: ConsoleLLM 모듈을 불러올 수 없습니다 (llama-cpp-python 설치 확인): {e}", file=sys.stderr)
+        sys.exit(1)
 
-    if not swift_files:
+    # Swift 파일이 있는지 확인
+    if not has_swift_files(args.project):
         print(f"Warning: 프로젝트 디렉토리에 Swift 파일이 없습니다: {args.project}", file=sys.stderr)
 
     # 디버그 모드 알림
     if args.debug:
-        print("Debug mode enabled: 개별 JSON 파일들도 함께 저장됩니다.")
+        print("Debug mode enabled: 파일별 결과(results_*.jsonl)도 함께 저장됩니다.")
 
     try:
         # ConsoleLLM 초기화
@@ -99,7 +102,9 @@ def main():
             n_gpu_layers=args.gpu_layers,
             n_threads=args.threads,
             enable_4bit_kv_cache=args.enable_4bit_kv_cache,
-            auto_preload=True
+            kv_quant=args.kv_cache_type,
+            # 분석기가 응답 캐시에 없는 첫 파일에서 모델을 로드 (모든 응답이 캐시에 있으면 로드 생략)
+            auto_preload=False
         )
 
         # 분석 실행
@@ -170,7 +175,7 @@ def main():
 
         # 디버그 모드일 때만 개별 파일 언급
         if args.debug:
-            print(f"디버깅용 개별 JSON 파일들도 {args.output_dir}에 저장되었습니다.")
+            print(f"디버깅용 파일별 결과(results_*.jsonl)도 {args.output_dir}에 저장되었습니다.")
 
     except FileNotFoundError as e:
         print(f"Error: 파일을 찾을 수 없습니다: {e}", file=sys.stderr)
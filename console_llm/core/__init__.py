@@ -7,8 +7,6 @@ console_llm/core/__init__.py
 ConsoleLLM 핵심 모듈 초기화
 """
 
-from .base_analyzer import BaseAnalyzer
-from .model_loader import OptimizedModelLoader, get_model_loader, preload_models
 from .utils import (
     validate_file_exists,
     load_json_config,
@@ -36,4 +34,27 @@ __all__ = [
     'ensure_directory',
     'format_file_size',
     'get_swift_files_count'
-]
\ No newline at end of file
+]
+
+# llama_cpp가 필요한 모듈은 처음 접근할 때 로드 (PEP 562, utils만 쓰는 스크립트는 llama_cpp 없이 동작)
+_LAZY_ATTRIBUTES = {
+    'BaseAnalyzer': '.base_analyzer',
+    'OptimizedModelLoader': '.model_loader',
+    'get_model_loader': '.model_loader',
+    'preload_models': '.model_loader',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -7,25 +7,80 @@ base_analyzer.py
 모듈화된 베이스 분석기 클래스
 """
 
+import asyncio
 import json
 import os
 import subprocess
 import threading
-from typing import List, Dict, Optional, Tuple, Any
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import ClassVar, List, Dict, Optional, Tuple, Any, Callable, FrozenSet, Union
 import re
-import glob
 from pathlib import Path
 
 from .model_loader import OptimizedModelLoader, get_model_loader
+from .utils import (
+    ast_cache_key, ast_cache_get, ast_cache_put, bytes_digest, content_digest,
+    completion_cache_key, completion_cache_get, completion_cache_put, extract_ast_json,
+    list_swift_files, read_config_file, read_source_bytes, loads_json, decode_source,
+    scan_files_for_identifiers, validate_file_exists
+)
+
+# 모델 출력 JSON 스키마 (문법 기반 샘플링으로 이 형태의 JSON만 생성되도록 제한하여 불필요한 디코딩 방지)
+ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reasoning": {"type": "string", "maxLength": 1024},
+        "identifiers": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["reasoning", "identifiers"]
+}
+
+# 응답 최대 토큰 수 (스키마로 출력 형태가 고정되므로 크게 잡을 필요 없음)
+MAX_RESPONSE_TOKENS = 1024
+
+# 모델 응답 생성 설정
+COMPLETION_PARAMS = {
+    "temperature": 0.2,
+    "top_p": 0.95,
+    "max_tokens": MAX_RESPONSE_TOKENS,
+    "response_format": {"type": "json_object", "schema": ANALYSIS_RESPONSE_SCHEMA},
+}
+
+# 응답 캐시 키에 포함하는 생성 설정 (설정이 바뀌면 이전 응답을 재사용하지 않음)
+_COMPLETION_PARAMS_KEY = json.dumps(COMPLETION_PARAMS, sort_keys=True)
+
+# 모델 출력 JSON 디코더 (호출마다 새로 만들지 않음)
+_JSON_DECODER = json.JSONDecoder()
+
+# JSON 파싱 실패 시 사용하는 정규식 (reasoning 문자열, identifiers 배열 내용)
+_REASONING_RE = re.compile(r'["\']reasoning["\']\s*:\s*["\'](.*?)["\']', re.DOTALL)
+_IDENTIFIERS_RE = re.compile(r'["\']identifiers["\']\s*:\s*\[(.*?)\]', re.DOTALL)
+
+# 모델 추론 워커 수 (하나의 llama.cpp 컨텍스트는 동시 호출을 지원하지 않으므로 단일 워커로 직렬 처리)
+INFERENCE_WORKERS = 1
+
+# 식별자 검색을 프로세스 풀로 나눠 실행하는 최소 파일 수와 작업 묶음 크기
+# (작은 프로젝트는 프로세스 시작 비용이 더 큼)
+PARALLEL_SCAN_MIN_FILES = 512
+SCAN_CHUNK_SIZE = 64
 
 
 class BaseAnalyzer:
     """공통 분석기 베이스 클래스 - 모듈화된 버전"""
 
+    # 모든 파일에 공통으로 쓰이는 시스템 프롬프트 (하위 클래스에서 설정)
+    _SYSTEM_PROMPT: ClassVar[str] = ""
+
+    # 식별자 검색 결과 캐시 (분석기 인스턴스 간 공유)
+    # {(프로젝트 절대 경로, 식별자 집합): (파일별 (경로, mtime, 크기) 서명, 일치 파일 목록)}
+    _identifier_scan_cache: ClassVar[Dict[Tuple[str, FrozenSet[str]], Tuple[Tuple, List[str]]]] = {}
+
     def __init__(self, base_model_path: str, lora_path: str = None,
                  model_loader: Optional[OptimizedModelLoader] = None,
                  n_ctx: int = 4096, n_gpu_layers: int = 0, n_threads: int = None,
-                 enable_4bit_kv_cache: bool = True):
+                 enable_4bit_kv_cache: bool = True, kv_quant: Optional[str] = None):
         """
         베이스 분석기 초기화
 
@@ -37,59 +92,103 @@ class BaseAnalyzer:
             n_gpu_layers: GPU 레이어 수
             n_threads: CPU 스레드 수
             enable_4bit_kv_cache: 4비트 KV 캐시 활성화
+            kv_quant: KV 캐시 타입 ("q4_0", "q8_0", "f16", 미지정 시 enable_4bit_kv_cache 기준)
         """
+        # LoRA 어댑터는 여기서 한 번만 확인 (모델 로더는 추론마다 다시 확인하지 않음)
+        if lora_path:
+            validate_file_exists(lora_path, "LoRA adapter")
+
         self.base_model_path = base_model_path
         self.lora_path = lora_path
         self.model_config = {
             "n_ctx": n_ctx,
             "n_gpu_layers": n_gpu_layers,
             "n_threads": n_threads,
-            "enable_4bit_kv_cache": enable_4bit_kv_cache
+            "enable_4bit_kv_cache": enable_4bit_kv_cache,
+            "kv_quant": kv_quant
         }
 
         # 모델 로더 설정
         self.model_loader = model_loader or get_model_loader()
+        # 첫 로드 이후 재사용할 모델 (LoRA 교체가 필요 없는 경우에만 보관)
+        self.model = None
 
         # AST 분석기 경로 (하위 클래스에서 설정)
         self.ast_analyzer_path = None
 
+        # 파이프라인 실행 중 계산한 파일 내용 다이제스트와 크기 (AST 캐시 키 계산, 정렬 시 재사용)
+        self._content_digests: Dict[str, bytes] = {}
+        self._file_sizes: Dict[str, int] = {}
+
         print(f"BaseAnalyzer 초기화 완료")
         print(f"  - Base model: {base_model_path}")
         print(f"  - LoRA adapter: {lora_path}")
 
     def _load_model(self):
-        """모델 로딩 (모델 로더 사용)"""
-        return self.model_loader.load_model(
+        """
+        모델 로딩 (모델 로더 사용)
+
+        첫 로드 이후에는 보관한 모델을 잠금 없이 바로 반환합니다. 베이스 모델을 공유하는 경우에는
+        다른 분석기가 LoRA를 바꿔 끼웠을 수 있으므로 매번 모델 로더를 거쳐 어댑터를 다시 활성화합니다.
+        """
+        model = self.model
+        if model is not None:
+            return model
+
+        # 동시에 처음 호출돼도 모델 로더가 같은 키의 로드를 한 번으로 직렬화함
+        model = self.model_loader.load_model(
             base_model_path=self.base_model_path,
             lora_path=self.lora_path,
             **self.model_config
         )
+        if not self.model_loader.shared_base:
+            self.model = model
+        return model
 
     def preload_model(self):
         """메인 스레드에서 모델을 미리 로드"""
         print("Pre-loading model into memory...")
         try:
-            self._load_model()
+            model = self._load_model()
             print("Model pre-loading complete.")
         except Exception as e:
             print(f"Model pre-loading failed: {e}")
             raise
 
+        self._prime_system_prompt(model)
+
+    def _prime_system_prompt(self, model) -> None:
+        """
+        시스템 프롬프트 부분의 KV 캐시를 미리 계산
+
+        llama.cpp는 직전 평가 토큰과 겹치는 가장 긴 접두사를 KV 캐시에서 재사용하므로,
+        시스템 프롬프트를 한 번 평가해 두면 이후 파일들은 사용자 프롬프트 부분만 prefill 합니다.
+        (추론은 단일 워커에서 연속 실행되므로 파일 간에도 같은 접두사가 계속 재사용됨)
+        """
+        if not self._SYSTEM_PROMPT:
+            return
+
+        try:
+            model.create_chat_completion(
+                messages=[{"role": "system", "content": self._SYSTEM_PROMPT}],
+                max_tokens=1,
+            )
+        except Exception as e:
+            print(f"Warning: System prompt priming failed: {e}")
+
     def load_swingft_config(self, config_path: str = None) -> Dict[str, Any]:
         """swingft_config.json 로드 (선택사항)"""
         if not config_path:
             print("Config file not provided, using minimal configuration")
             return {"project": {"input": None}}
 
-        if not os.path.exists(config_path):
-            print(f"Warning: Config file not found: {config_path}")
-            return {"project": {"input": None}}
-
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_config_file(config_path)
             print(f"Config loaded from: {config_path}")
             return config
+        except FileNotFoundError:
+            print(f"Warning: Config file not found: {config_path}")
+            return {"project": {"input": None}}
         except Exception as e:
             print(f"Warning: Failed to load config from {config_path}: {e}")
             return {"project": {"input": None}}
@@ -109,49 +208,85 @@ class BaseAnalyzer:
             print(f"Warning: AST analyzer not found at {analyzer_path}")
             return None
 
-        try:
-            command_str = f'"{analyzer_path}" "{swift_file_path}"'
+        cache_key = ast_cache_key(swift_file_path, analyzer_path)
+        if cache_key:
+            cached = ast_cache_get(cache_key)
+            if cached is not None:
+                return cached
 
+        try:
             process = subprocess.run(
-                command_str,
-                shell=True,
+                [str(analyzer_path), swift_file_path],
                 capture_output=True,
-                text=True,
-                encoding='utf-8',
                 timeout=60
             )
 
             if process.returncode != 0:
-                error_message = process.stderr.strip()
+                error_message = process.stderr.decode('utf-8', errors='replace').strip()
                 print(f"Warning: AST analyzer failed for {swift_file_path}. Error: {error_message}")
                 return None
 
-            output = process.stdout.strip()
-            if not output:
-                return None
+            ast_json = extract_ast_json(process.stdout)
+            if ast_json and cache_key:
+                ast_cache_put(cache_key, ast_json)
+            return ast_json
 
-            first_bracket = output.find('[')
-            first_brace = output.find('{')
+        except subprocess.TimeoutExpired:
+            print(f"Warning: AST analysis timed out for {swift_file_path}")
+            return None
+        except Exception as e:
+            print(f"Warning: AST analysis failed for {swift_file_path}: {e}")
+            return None
 
-            if first_bracket == -1 and first_brace == -1:
-                return None
+    async def run_swift_analyzer_async(self, swift_file_path: str, source: Optional[bytes] = None) -> Optional[str]:
+        """
+        run_swift_analyzer의 asyncio 버전 (파이프라인에서 사용)
 
-            if first_bracket != -1 and (first_bracket < first_brace or first_brace == -1):
-                json_start = first_bracket
-            else:
-                json_start = first_brace
+        Args:
+            swift_file_path: Swift 파일 경로
+            source: 이미 읽은 파일 내용 (있으면 캐시 키 계산 시 파일을 다시 읽지 않음)
+        """
+        analyzer_path = self.ast_analyzer_path
+
+        if not analyzer_path or not os.path.exists(analyzer_path):
+            print(f"Warning: AST analyzer not found at {analyzer_path}")
+            return None
 
-            json_part = output[json_start:]
+        digest = self._content_digests.get(swift_file_path)
+        if digest is None and source is not None:
+            digest = bytes_digest(source)
+
+        cache_key = ast_cache_key(swift_file_path, analyzer_path, digest)
+        if cache_key:
+            cached = ast_cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                str(analyzer_path), swift_file_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
 
             try:
-                json.loads(json_part)
-                return json_part
-            except json.JSONDecodeError:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=60)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                print(f"Warning: AST analysis timed out for {swift_file_path}")
                 return None
 
-        except subprocess.TimeoutExpired:
-            print(f"Warning: AST analysis timed out for {swift_file_path}")
-            return None
+            if process.returncode != 0:
+                error_message = stderr.decode('utf-8', errors='replace').strip()
+                print(f"Warning: AST analyzer failed for {swift_file_path}. Error: {error_message}")
+                return None
+
+            ast_json = extract_ast_json(stdout)
+            if ast_json and cache_key:
+                ast_cache_put(cache_key, ast_json)
+            return ast_json
+
         except Exception as e:
             print(f"Warning: AST analysis failed for {swift_file_path}: {e}")
             return None
@@ -163,10 +298,17 @@ class BaseAnalyzer:
 
         try:
             start_index = text.find('{')
-            end_index = text.rfind('}')
-            if start_index != -1 and end_index != -1 and start_index < end_index:
-                json_str = text[start_index:end_index + 1]
-                data = json.loads(json_str)
+            if start_index != -1:
+                data = None
+                # 스키마로 제한된 출력은 JSON 객체뿐이므로 먼저 전체를 그대로 파싱 (orjson 사용 가능 시 orjson)
+                if start_index == 0 or text[:start_index].isspace():
+                    try:
+                        data = loads_json(text)
+                    except ValueError:
+                        pass
+                # 실패하면 첫 '{'부터 JSON 값 하나만 디코딩 (부분 문자열을 만들지 않고, 뒤에 붙은 텍스트는 무시)
+                if data is None:
+                    data, _ = _JSON_DECODER.raw_decode(text, start_index)
                 reasoning = data.get("reasoning", "")
                 identifiers = data.get("identifiers", [])
 
@@ -178,11 +320,11 @@ class BaseAnalyzer:
         reasoning_str = ""
         identifiers_list = []
 
-        reasoning_match = re.search(r'["\']reasoning["\']\s*:\s*["\'](.*?)["\']', text, re.DOTALL)
+        reasoning_match = _REASONING_RE.search(text)
         if reasoning_match:
             reasoning_str = reasoning_match.group(1).strip()
 
-        identifiers_match = re.search(r'["\']identifiers["\']\s*:\s*\[(.*?)\]', text, re.DOTALL)
+        identifiers_match = _IDENTIFIERS_RE.search(text)
         if identifiers_match:
             content_str = identifiers_match.group(1).strip()
             if content_str:
@@ -194,39 +336,66 @@ class BaseAnalyzer:
     def find_swift_files_with_identifiers(self, project_path: str, identifiers: List[str]) -> List[str]:
         """프로젝트에서 특정 식별자를 포함한 Swift 파일들을 찾음"""
         matching_files = []
-        swift_files = glob.glob(os.path.join(project_path, "**/*.swift"), recursive=True)
+        swift_files = list_swift_files(project_path)
+
+        # 같은 프로젝트를 같은 식별자로 다시 검색하는 경우(analyze_both, analyze_batch 등),
+        # 파일 목록과 각 파일의 mtime/크기가 그대로면 내용을 다시 읽지 않고 이전 결과 사용
+        cache_key = (os.path.abspath(project_path), frozenset(identifiers))
+        signature = self._scan_signature(swift_files)
+        cached = self._identifier_scan_cache.get(cache_key)
+        if signature is not None and cached is not None and cached[0] == signature:
+            print(f"Using cached identifier scan: {len(cached[1])} files containing the specified identifiers")
+            return list(cached[1])
 
         print(f"Scanning {len(swift_files)} Swift files for identifiers: {identifiers}")
 
-        for swift_file in swift_files:
-            try:
-                with open(swift_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                for identifier in identifiers:
-                    if identifier.endswith('*'):
-                        prefix = identifier[:-1]
-                        if prefix in content:
-                            matching_files.append(swift_file)
-                            break
-                    elif identifier.startswith('**'):
-                        matching_files.append(swift_file)
-                        break
-                    elif identifier in content:
-                        matching_files.append(swift_file)
-                        break
-
-            except (UnicodeDecodeError, OSError) as e:
-                print(f"Warning: Could not read {swift_file}: {e}")
-                continue
+        # 파일이 많으면 여러 프로세스에서 나눠 검색 (매칭은 GIL을 잡고 도는 CPU 작업)
+        if len(swift_files) >= PARALLEL_SCAN_MIN_FILES:
+            matching_files = self._scan_files_parallel(swift_files, identifiers)
+        else:
+            matching_files, warnings = scan_files_for_identifiers(swift_files, identifiers)
+            for warning in warnings:
+                print(warning)
+
+        # 파일 목록에 중복 경로가 없으므로 각 파일은 한 번만 추가됨 (탐색 순서 유지)
+        print(f"Found {len(matching_files)} files containing the specified identifiers")
+
+        if signature is not None:
+            self._identifier_scan_cache[cache_key] = (signature, list(matching_files))
+        return matching_files
 
-        unique_files = list(set(matching_files))
-        print(f"Found {len(unique_files)} files containing the specified identifiers")
-        return unique_files
+    def _scan_files_parallel(self, swift_files: List[str], identifiers: List[str]) -> List[str]:
+        """파일 목록을 묶음 단위로 나눠 프로세스 풀에서 식별자 검색 (실패 시 현재 프로세스에서 검색)"""
+        chunks = [swift_files[i:i + SCAN_CHUNK_SIZE] for i in range(0, len(swift_files), SCAN_CHUNK_SIZE)]
+        scan_chunk = partial(scan_files_for_identifiers, identifiers=list(identifiers))
+
+        try:
+            with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(chunks))) as executor:
+                chunk_results = list(executor.map(scan_chunk, chunks))
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Warning: Parallel identifier scan failed, scanning in-process: {e}")
+            chunk_results = [scan_chunk(swift_files)]
+
+        matching_files = []
+        for chunk_matches, warnings in chunk_results:
+            matching_files.extend(chunk_matches)
+            for warning in warnings:
+                print(warning)
+        return matching_files
+
+    def _scan_signature(self, swift_files: List[str]) -> Optional[Tuple]:
+        """파일 목록의 (경로, mtime, 크기) 서명 (stat 실패 시 None → 캐시 사용 안 함)"""
+        try:
+            return tuple(
+                (swift_file, st.st_mtime_ns, st.st_size)
+                for swift_file, st in ((f, os.stat(f)) for f in swift_files)
+            )
+        except OSError:
+            return None
 
     def get_all_swift_files(self, project_path: str) -> List[str]:
         """프로젝트의 모든 Swift 파일들을 찾음"""
-        swift_files = glob.glob(os.path.join(project_path, "**/*.swift"), recursive=True)
+        swift_files = list_swift_files(project_path)
         print(f"Found {len(swift_files)} Swift files in project")
         return swift_files
 
@@ -277,40 +446,67 @@ class BaseAnalyzer:
         """
         ast_json = self.run_swift_analyzer(swift_file_path)
         if not ast_json:
-            return {
-                "file_path": swift_file_path,
-                "error": "AST analysis failed",
-                "reasoning": "",
-                "identifiers": []
-            }
+            return self._ast_failed_result(swift_file_path)
 
-        system_prompt, user_prompt = self.create_model_input(swift_file_path, ast_json)
+        return self._run_inference(swift_file_path, ast_json)
+
+    def _ast_failed_result(self, swift_file_path: str) -> Dict[str, Any]:
+        """AST 분석 실패 시 결과 딕셔너리"""
+        return {
+            "file_path": swift_file_path,
+            "error": "AST analysis failed",
+            "reasoning": "",
+            "identifiers": []
+        }
+
+    def _skipped_result(self, swift_file_path: str) -> Dict[str, Any]:
+        """AST 사전 필터로 모델 추론을 생략한 파일의 결과 딕셔너리"""
+        return {
+            "file_path": swift_file_path,
+            "reasoning": "Skipped: no target identifier is referenced in the AST symbols",
+            "identifiers": [],
+            "skipped": True
+        }
+
+    def _error_result(self, swift_file_path: str, error: str) -> Dict[str, Any]:
+        """예외 발생 시 결과 딕셔너리"""
+        return {
+            "file_path": swift_file_path,
+            "error": error,
+            "reasoning": "",
+            "identifiers": []
+        }
+
+    def _run_inference(self, swift_file_path: str, ast_json: str,
+                       model_input: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+        """
+        AST 정보가 준비된 Swift 파일에 대해 모델 추론 수행
+
+        model_input이 주어지면 (이미 준비된 (system_prompt, user_prompt)) 프롬프트 생성을 건너뜁니다.
+        같은 모델/프롬프트/설정으로 이미 받은 응답이 캐시에 있으면 모델을 호출하지 않습니다.
+        """
+        model_input = model_input or self.create_model_input(swift_file_path, ast_json)
+        system_prompt, user_prompt = model_input
 
         try:
-            model = self._load_model()
+            cache_key = self._completion_cache_key(model_input)
+            raw_output = completion_cache_get(cache_key) if cache_key else None
 
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
+            if raw_output is None:
+                model = self._load_model()
 
-            response = model.create_chat_completion(
-                messages=messages,
-                temperature=0.2,
-                top_p=0.95,
-                max_tokens=4096,
-            )
+                messages = [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ]
 
-            raw_output = response['choices'][0]['message']['content']
-            reasoning, identifiers = self.extract_json_from_output(raw_output)
+                response = model.create_chat_completion(messages=messages, **COMPLETION_PARAMS)
 
-            return {
-                "file_path": swift_file_path,
-                "reasoning": reasoning,
-                "identifiers": identifiers,
-                "raw_output": raw_output,
-                "ast_json": ast_json
-            }
+                raw_output = response['choices'][0]['message']['content']
+                if cache_key:
+                    completion_cache_put(cache_key, raw_output)
+
+            return self._inference_result(swift_file_path, raw_output)
 
         except Exception as e:
             return {
@@ -320,13 +516,253 @@ class BaseAnalyzer:
                 "identifiers": []
             }
 
-    def create_model_input(self, swift_file_path: str, ast_json: str) -> tuple[str, str]:
+    def _inference_result(self, swift_file_path: str, raw_output: str) -> Dict[str, Any]:
+        """모델 출력(새로 생성했거나 캐시된 응답)으로 결과 딕셔너리 구성"""
+        reasoning, identifiers = self.extract_json_from_output(raw_output)
+
+        return {
+            "file_path": swift_file_path,
+            "reasoning": reasoning,
+            "identifiers": identifiers,
+            "raw_output": raw_output
+        }
+
+    def _completion_cache_key(self, model_input: Tuple[str, str]) -> Optional[str]:
+        """모델 파일/로더 설정/생성 설정/프롬프트 기준 응답 캐시 키 (모델 파일을 확인할 수 없으면 None)"""
+        system_prompt, user_prompt = model_input
+        return completion_cache_key(
+            (self.base_model_path, self.lora_path),
+            json.dumps(self.model_config, sort_keys=True), _COMPLETION_PARAMS_KEY,
+            system_prompt, user_prompt
+        )
+
+    def _cached_completion(self, model_input: Tuple[str, str]) -> Optional[str]:
+        """캐시된 모델 응답 반환 (없으면 None)"""
+        cache_key = self._completion_cache_key(model_input)
+        return completion_cache_get(cache_key) if cache_key else None
+
+    def run_pipeline(self, swift_files: List[str], max_workers: int,
+                     on_result: Callable[[str, Dict[str, Any]], None],
+                     ast_filter: Optional[Callable[[str], bool]] = None) -> None:
+        """
+        AST 추출과 모델 추론을 2단계 asyncio 파이프라인으로 실행
+
+        AST 추출은 max_workers개의 서브프로세스로 병렬 실행되고, 모델 추론은 단일 워커가
+        준비된 순서대로 연속 처리하므로 추론이 진행되는 동안 다음 파일들의 AST 추출이 끝나 있습니다.
+        모델은 응답 캐시에 없는 파일이 처음 나왔을 때 로드되므로, 모든 응답이 캐시에 있으면 로드하지 않습니다.
+
+        Args:
+            swift_files: 분석할 Swift 파일 목록
+            max_workers: AST 추출 동시 실행 수 (모델 추론 대기열 크기도 이 값에 비례)
+            on_result: 파일 하나의 분석이 끝날 때마다 호출되는 콜백 (swift_file, result)
+            ast_filter: AST JSON을 받아 모델 추론이 필요한지 판단하는 함수 (False면 추론 생략)
+        """
+        groups = self._group_by_content(swift_files)
+        unique_files = list(groups)
+        if len(unique_files) < len(swift_files):
+            print(f"Skipping {len(swift_files) - len(unique_files)} duplicate Swift files (identical content)")
+
+        # 큰 파일(긴 프롬프트)부터 처리하여, 마지막에 긴 작업 하나만 남아 대기하는 꼬리 구간을 줄임
+        unique_files.sort(key=self._file_size, reverse=True)
+
+        def fan_out(swift_file: str, result: Dict[str, Any]) -> None:
+            on_result(swift_file, result)
+            # 내용이 같은 나머지 파일에는 결과를 복사하여 전달
+            for duplicate in groups[swift_file]:
+                duplicate_result = dict(result)
+                duplicate_result["file_path"] = duplicate
+                on_result(duplicate, duplicate_result)
+
+        pipeline = self._pipeline(unique_files, max_workers, INFERENCE_WORKERS, fan_out, ast_filter)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(pipeline)
+            return
+
+        # 이미 이벤트 루프가 실행 중인 환경(예: Jupyter)에서는 별도 스레드에서 실행
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            runner.submit(asyncio.run, pipeline).result()
+
+    def _file_size(self, path: str) -> int:
+        """정렬용 파일 크기 (읽을 수 없는 파일은 0)"""
+        size = self._file_sizes.get(path)
+        if size is not None:
+            return size
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    def _group_by_content(self, swift_files: List[str]) -> Dict[str, List[str]]:
+        """
+        내용이 동일한 Swift 파일들을 묶음
+
+        크기가 같은 파일이 있을 때만 내용을 읽어 해시하므로, 대부분의 파일은 여기서 읽지 않고
+        파이프라인에서 한 번만 읽힙니다. 계산한 다이제스트는 AST 캐시 키에도 재사용됩니다.
+
+        Returns:
+            {대표 파일 경로: [내용이 같은 나머지 파일 경로들]} (입력 순서 유지)
+        """
+        groups: Dict[str, List[str]] = {}
+        representative_by_digest: Dict[bytes, str] = {}
+        self._content_digests = {}
+        self._file_sizes = {}
+
+        size_counts: Dict[int, int] = {}
+        for swift_file in swift_files:
+            try:
+                size = os.stat(swift_file).st_size
+            except OSError:
+                continue
+            self._file_sizes[swift_file] = size
+            size_counts[size] = size_counts.get(size, 0) + 1
+
+        for swift_file in swift_files:
+            size = self._file_sizes.get(swift_file)
+            if size is None or size_counts[size] == 1:
+                # 크기가 유일하면 중복일 수 없음 (읽을 수 없는 파일도 각자 분석하여 기존과 같은 오류 결과를 남김)
+                groups[swift_file] = []
+                continue
+
+            try:
+                digest = content_digest(swift_file)
+                self._content_digests[swift_file] = digest
+            except OSError:
+                groups[swift_file] = []
+                continue
+
+            representative = representative_by_digest.get(digest)
+            if representative is None:
+                representative_by_digest[digest] = swift_file
+                groups[swift_file] = []
+            else:
+                groups[representative].append(swift_file)
+
+        return groups
+
+    async def _pipeline(self, swift_files: List[str], n_ast_slots: int, n_model_slots: int,
+                        on_result: Callable[[str, Dict[str, Any]], None],
+                        ast_filter: Optional[Callable[[str], bool]] = None) -> None:
+        """
+        AST 단계(서브프로세스)와 모델 단계(스레드 오프로드)를 연결하는 파이프라인
+
+        단계별로 고정된 수의 워커가 파일을 하나씩 가져가고, 두 단계 사이의 큐 크기도 제한되므로
+        동시에 메모리에 올라오는 작업 수는 파일 수와 무관하게 O(워커 수)로 유지됩니다.
+        """
+        loop = asyncio.get_running_loop()
+        pending_files = iter(swift_files)
+        ast_ready: asyncio.Queue = asyncio.Queue(maxsize=max(n_ast_slots, n_model_slots) * 2)
+        # 모델 로드(+시스템 프롬프트 프라이밍) 작업 (모든 응답이 캐시에 있으면 시작하지 않음)
+        model_ready: Optional[asyncio.Future] = None
+
+        async def ast_worker() -> None:
+            nonlocal model_ready
+            for swift_file in pending_files:
+                try:
+                    prepared = await self._preprocess(swift_file, io_executor, ast_filter)
+                except Exception as e:
+                    on_result(swift_file, self._error_result(swift_file, str(e)))
+                    continue
+
+                if isinstance(prepared, dict):
+                    # AST 실패, 사전 필터 등으로 추론 없이 결과가 확정된 경우
+                    on_result(swift_file, prepared)
+                    continue
+
+                ast_json, model_input = prepared
+                if model_ready is None:
+                    # 첫 캐시 미스에서 모델 스레드에 로드를 맡김 (이후 추론보다 먼저 실행되고, 그동안 AST 추출은 계속 진행)
+                    model_ready = loop.run_in_executor(model_executor, self.preload_model)
+                await ast_ready.put((swift_file, ast_json, model_input))
+
+        async def model_worker() -> None:
+            while True:
+                item = await ast_ready.get()
+                if item is None:
+                    return
+
+                swift_file, ast_json, model_input = item
+                try:
+                    await model_ready
+                    result = await loop.run_in_executor(
+                        model_executor, self._run_inference, swift_file, ast_json, model_input
+                    )
+                except Exception as e:
+                    result = self._error_result(swift_file, str(e))
+
+                on_result(swift_file, result)
+
+        with ThreadPoolExecutor(max_workers=n_ast_slots) as io_executor, \
+                ThreadPoolExecutor(max_workers=n_model_slots) as model_executor:
+            model_tasks = [asyncio.ensure_future(model_worker()) for _ in range(n_model_slots)]
+
+            await asyncio.gather(*(ast_worker() for _ in range(n_ast_slots)))
+
+            # AST 단계가 끝나면 모델 워커마다 종료 신호 전달
+            for _ in model_tasks:
+                await ast_ready.put(None)
+            await asyncio.gather(*model_tasks)
+
+    async def _preprocess(self, swift_file: str, io_executor: ThreadPoolExecutor,
+                          ast_filter: Optional[Callable[[str], bool]] = None
+                          ) -> Union[Tuple[str, Tuple[str, str]], Dict[str, Any]]:
+        """
+        파일 하나의 전처리 (소스 읽기+디코딩 → AST 추출 → 프롬프트 조립 → 응답 캐시 확인)를 한 흐름으로 수행
+
+        소스는 한 번만 읽어 AST 캐시 키와 프롬프트에 함께 쓰고, 프롬프트는 디코딩된 문자열을
+        그대로 이어 붙여 만들므로 같은 바이트를 다시 읽거나 변환하지 않습니다.
+
+        Returns:
+            (ast_json, (system_prompt, user_prompt)) 또는 추론 없이 확정된 결과 딕셔너리
+        """
+        loop = asyncio.get_running_loop()
+        source, swift_code = await loop.run_in_executor(io_executor, self._load_source, swift_file)
+
+        ast_json = await self.run_swift_analyzer_async(swift_file, source)
+        if not ast_json:
+            return self._ast_failed_result(swift_file)
+
+        if ast_filter is not None and not ast_filter(ast_json):
+            return self._skipped_result(swift_file)
+
+        if swift_code is None:
+            # 읽기/디코딩 실패 시 하위 클래스의 기본 처리에 맡김 (파일 I/O이므로 I/O 스레드에서 실행)
+            model_input = await loop.run_in_executor(
+                io_executor, self.create_model_input, swift_file, ast_json
+            )
+        else:
+            model_input = self.create_model_input(swift_file, ast_json, swift_code)
+
+        # 이미 받은 모델 응답이 캐시에 있으면 모델 단계로 넘기지 않음
+        cached_output = await loop.run_in_executor(io_executor, self._cached_completion, model_input)
+        if cached_output is not None:
+            return self._inference_result(swift_file, cached_output)
+
+        return ast_json, model_input
+
+    def _load_source(self, swift_file_path: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """Swift 파일을 읽어 (원본 바이트, 디코딩된 소스) 반환 (실패한 항목은 None)"""
+        try:
+            source = read_source_bytes(swift_file_path)
+        except OSError:
+            return None, None
+
+        try:
+            return source, decode_source(source)
+        except UnicodeDecodeError:
+            return source, None
+
+    def create_model_input(self, swift_file_path: str, ast_json: str,
+                           swift_code: Optional[str] = None) -> tuple[str, str]:
         """
         모델 입력 프롬프트 생성 (하위 클래스에서 구현)
 
         Args:
             swift_file_path: Swift 파일 경로
             ast_json: AST JSON 데이터
+            swift_code: 이미 읽은 소스 코드 (없으면 파일에서 읽음)
 
         Returns:
             (system_prompt, user_prompt) 튜플
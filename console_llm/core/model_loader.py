@@ -4,18 +4,189 @@ model_loader.py
 최적화된 모델 로더 - 4비트 KV 캐시 및 LoRA 어댑터 지원
 """
 
+import inspect
 import os
+import subprocess
+import sys
 import threading
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple
+import llama_cpp
 from llama_cpp import Llama
 
+from .utils import validate_file_exists
+
+# KV 캐시 양자화 타입 -> ggml 타입 번호 (llama.cpp의 -ctk/-ctv 옵션과 동일)
+KV_CACHE_TYPES = {
+    "f16": 1,    # GGML_TYPE_F16
+    "q4_0": 2,   # GGML_TYPE_Q4_0
+    "q8_0": 8,   # GGML_TYPE_Q8_0
+}
+
+# KV 캐시 원소 하나당 바이트 수 (q4_0/q8_0은 32개 원소 블록마다 f16 스케일 2바이트 포함)
+KV_CACHE_BYTES_PER_ELEMENT = {
+    "f16": 2.0,
+    "q4_0": 18 / 32,
+    "q8_0": 34 / 32,
+}
+
+
+# 모델 파일 선읽기 단위
+PREFETCH_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def _read_file_into_page_cache(path: str) -> None:
+    """파일을 순차적으로 읽어 페이지 캐시에 올림 (읽은 내용은 버림)"""
+    try:
+        with open(path, 'rb', buffering=0) as f:
+            while f.read(PREFETCH_CHUNK_SIZE):
+                pass
+    except OSError:
+        pass
+
+
+def prefetch_model_file(path: Optional[str]) -> None:
+    """
+    Linux에서 모델 파일의 순차 선읽기 힌트를 주고 백그라운드로 페이지 캐시를 채움
+
+    mmap 로드 시 콜드 캐시에서 발생하는 4KB 단위 랜덤 페이지 폴트를 줄이기 위한 것으로,
+    Llama 생성 전에 호출합니다. 다른 플랫폼이나 파일이 없으면 아무것도 하지 않습니다.
+    """
+    if not path or not sys.platform.startswith('linux') or not hasattr(os, 'posix_fadvise'):
+        return
+
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        # 어드바이스 값은 비트 플래그가 아니므로 각각 호출
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+    threading.Thread(target=_read_file_into_page_cache, args=(path,), daemon=True).start()
+
+
+def physical_cpu_count() -> int:
+    """
+    물리 코어 수 반환 (하이퍼스레딩 형제 코어 제외, 알 수 없으면 논리 코어 수)
+
+    llama.cpp 연산 스레드가 같은 물리 코어의 하이퍼스레드끼리 경쟁하지 않도록 스레드 수 기본값으로 사용합니다.
+    """
+    logical = os.cpu_count() or 1
+
+    if sys.platform.startswith('linux'):
+        try:
+            cores = set()
+            physical_id = None
+            with open('/proc/cpuinfo', 'r') as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    key = key.strip()
+                    if key == 'physical id':
+                        physical_id = value.strip()
+                    elif key == 'core id':
+                        cores.add((physical_id, value.strip()))
+            if cores:
+                return min(len(cores), logical)
+        except OSError:
+            pass
+    elif sys.platform == 'darwin':
+        try:
+            output = subprocess.run(['sysctl', '-n', 'hw.physicalcpu'], capture_output=True,
+                                    text=True, timeout=5).stdout
+            return max(1, min(int(output.strip()), logical))
+        except (OSError, ValueError, subprocess.SubprocessError):
+            pass
+
+    return logical
+
+
+def _find_lora_api() -> Optional[Tuple[Any, Any, Any]]:
+    """
+    런타임 LoRA 교체용 저수준 함수 (init, set, clear) 반환 (지원하지 않는 버전이면 None)
+
+    llama-cpp-python 버전에 따라 함수 이름이 다름
+    """
+    candidates = [
+        ("llama_adapter_lora_init", "llama_set_adapter_lora", "llama_clear_adapter_lora"),
+        ("llama_lora_adapter_init", "llama_lora_adapter_set", "llama_lora_adapter_clear"),
+    ]
+    for names in candidates:
+        funcs = tuple(getattr(llama_cpp, name, None) for name in names)
+        if all(funcs):
+            return funcs
+    return None
+
+
+# 런타임 LoRA 교체 지원 시: 베이스 모델 하나를 공유하고 어댑터만 바꿔 끼움
+_LORA_API = _find_lora_api()
+
+
+def _supports_flash_attn() -> bool:
+    """설치된 llama-cpp-python의 Llama가 flash_attn 인자를 받는지 확인 (이전 버전은 인자 자체가 없음)"""
+    try:
+        return 'flash_attn' in inspect.signature(Llama.__init__).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+_FLASH_ATTN_SUPPORTED = _supports_flash_attn()
+
+
+def resolve_kv_quant(kv_quant: Optional[str], enable_4bit_kv_cache: bool = True) -> str:
+    """KV 캐시 양자화 타입 결정 (kv_quant 미지정 시 enable_4bit_kv_cache 기준)"""
+    if kv_quant is None:
+        return "q4_0" if enable_4bit_kv_cache else "f16"
+    if kv_quant not in KV_CACHE_TYPES:
+        raise ValueError(f"Unsupported KV cache type: {kv_quant} (choose from {', '.join(KV_CACHE_TYPES)})")
+    return kv_quant
+
+
+def estimate_kv_cache_bytes(model: Llama, kv_quant: str, v_quant: Optional[str] = None) -> Optional[int]:
+    """
+    GGUF 메타데이터로 KV 캐시 메모리 사용량 추정 (v_quant 미지정 시 V 캐시도 kv_quant)
+
+    Returns:
+        추정 바이트 수 (메타데이터가 부족하면 None)
+    """
+    try:
+        metadata = model.metadata
+        arch = metadata["general.architecture"]
+        n_layer = int(metadata[f"{arch}.block_count"])
+        n_embd = int(metadata[f"{arch}.embedding_length"])
+        n_head = int(metadata[f"{arch}.attention.head_count"])
+        n_head_kv = int(metadata.get(f"{arch}.attention.head_count_kv", n_head))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+    n_embd_kv = n_embd // n_head * n_head_kv
+    # K와 V 각각 한 벌
+    n_elements = n_layer * model.n_ctx() * n_embd_kv
+    bytes_per_element = KV_CACHE_BYTES_PER_ELEMENT[kv_quant] + KV_CACHE_BYTES_PER_ELEMENT[v_quant or kv_quant]
+    return int(n_elements * bytes_per_element)
+
 
 class OptimizedModelLoader:
     """최적화된 GGUF 모델 로더"""
 
     def __init__(self):
         self.model_cache: Dict[str, Llama] = {}
+        self.kv_cache_types: Dict[str, str] = {}
+        # flash attention 미지원으로 V 캐시를 f16으로 유지한 모델의 V 캐시 타입
+        self.v_cache_types: Dict[str, str] = {}
+        # 공유 베이스 모델별 LoRA 어댑터 핸들과 현재 활성 어댑터
+        self.lora_adapters: Dict[Tuple[str, str], Any] = {}
+        self.active_loras: Dict[str, Optional[str]] = {}
+        # 캐시 키별 로드 잠금 (model_lock은 캐시 조회/저장에만 사용)
+        self.loading_locks: Dict[str, threading.Lock] = {}
         self.model_lock = threading.Lock()
+        # 런타임 LoRA 교체 지원 여부 (True면 모든 LoRA가 베이스 모델 하나를 공유)
+        self.shared_base = _LORA_API is not None
 
     def load_model(self,
                    base_model_path: str,
@@ -23,29 +194,61 @@ class OptimizedModelLoader:
                    n_ctx: int = 4096,
                    n_gpu_layers: int = 0,
                    n_threads: Optional[int] = None,
-                   enable_4bit_kv_cache: bool = True) -> Llama:
+                   enable_4bit_kv_cache: bool = True,
+                   kv_quant: Optional[str] = None,
+                   activate_lora: bool = True,
+                   n_threads_batch: Optional[int] = None) -> Llama:
         """
         최적화된 모델 로딩
 
+        런타임 LoRA 교체를 지원하는 llama-cpp-python이면 베이스 모델은 한 번만 로드하고,
+        요청된 LoRA 어댑터를 같은 컨텍스트에 바꿔 끼워 반환합니다 (Exclude/Sensitive 가중치 공유).
+        이 경우 같은 베이스 모델을 쓰는 분석은 순차적으로 실행해야 합니다.
+
         Args:
             base_model_path: 베이스 모델 경로
             lora_path: LoRA 어댑터 경로
             n_ctx: 컨텍스트 크기
             n_gpu_layers: GPU 레이어 수
-            n_threads: CPU 스레드 수
-            enable_4bit_kv_cache: 4비트 KV 캐시 활성화
+            n_threads: CPU 스레드 수 (미지정 시 물리 코어 수)
+            enable_4bit_kv_cache: 4비트 KV 캐시 활성화 (kv_quant 미지정 시 q4_0 / f16 선택)
+            kv_quant: KV 캐시 타입 ("q4_0", "q8_0", "f16")
+            activate_lora: 베이스 공유 시 요청한 LoRA로 교체할지 여부 (False면 현재 어댑터는 유지하고 핸들만 로드, 프리로드용)
+            n_threads_batch: 프롬프트 처리(prefill) 스레드 수 (미지정 시 n_threads와 무관하게 물리 코어 수)
 
         Returns:
             로드된 Llama 모델
         """
-        # 캐시 키 생성
-        cache_key = f"{base_model_path}:{lora_path}:{n_ctx}:{n_gpu_layers}:{enable_4bit_kv_cache}"
+        kv_quant = resolve_kv_quant(kv_quant, enable_4bit_kv_cache)
+
+        shared_base = self.shared_base
+
+        # 캐시 키 생성 (베이스 공유 시 LoRA는 키에 포함하지 않음)
+        if shared_base:
+            cache_key = f"{base_model_path}:{n_ctx}:{n_gpu_layers}:{kv_quant}"
+        else:
+            cache_key = f"{base_model_path}:{lora_path}:{n_ctx}:{n_gpu_layers}:{kv_quant}"
+
+        # LoRA 교체가 필요 없는 캐시 적중은 잠금 없이 반환 (dict 조회는 원자적)
+        if not shared_base:
+            model = self.model_cache.get(cache_key)
+            if model is not None:
+                return model
 
         with self.model_lock:
             # 캐시된 모델이 있으면 반환
-            if cache_key in self.model_cache:
-                print(f"Using cached model: {cache_key}")
-                return self.model_cache[cache_key]
+            model = self._get_cached_model(cache_key, shared_base, activate_lora, lora_path)
+            if model is not None:
+                return model
+            # 같은 키의 로드만 직렬화 (다른 키의 모델은 병렬로 로드)
+            key_lock = self.loading_locks.setdefault(cache_key, threading.Lock())
+
+        with key_lock:
+            # 대기하는 동안 다른 스레드가 로드를 끝냈는지 다시 확인
+            with self.model_lock:
+                model = self._get_cached_model(cache_key, shared_base, activate_lora, lora_path)
+                if model is not None:
+                    return model
 
             print(f"Loading new model: {base_model_path}")
             if lora_path:
@@ -65,36 +268,106 @@ class OptimizedModelLoader:
                     "rope_freq_scale": 1.0,
                 }
 
-                # 4비트 KV 캐시 설정
-                if enable_4bit_kv_cache:
-                    model_params.update({
-                        "type_k": 1,  # GGML_TYPE_Q4_0
-                        "type_v": 1,  # GGML_TYPE_Q4_0
-                    })
-                    print("4-bit KV cache enabled")
-
-                # CPU 스레드 설정
-                if n_threads:
-                    model_params["n_threads"] = n_threads
-
-                # LoRA 어댑터 설정
-                if lora_path and os.path.exists(lora_path):
+                # KV 캐시 양자화 설정 (양자화된 V 캐시는 llama.cpp에서 flash attention이 필요)
+                model_params.update({
+                    "type_k": KV_CACHE_TYPES[kv_quant],
+                    "type_v": KV_CACHE_TYPES[kv_quant],
+                })
+                v_quant = None
+                if kv_quant != "f16":
+                    if _FLASH_ATTN_SUPPORTED:
+                        model_params["flash_attn"] = True
+                    else:
+                        # flash attention 없이는 양자화된 V 캐시를 쓸 수 없으므로 V 캐시만 f16으로 유지
+                        model_params["type_v"] = KV_CACHE_TYPES["f16"]
+                        v_quant = "f16"
+                        print(f"Warning: installed llama-cpp-python does not support flash_attn; "
+                              f"using {kv_quant} K cache with f16 V cache")
+                    print(f"{kv_quant} KV cache enabled")
+
+                # CPU 스레드 설정 (미지정 시 물리 코어 수, 프롬프트 처리(prefill)는 따로 지정한 경우에만 변경)
+                physical_cores = None if n_threads and n_threads_batch else physical_cpu_count()
+                model_params["n_threads"] = n_threads or physical_cores
+                model_params["n_threads_batch"] = n_threads_batch or physical_cores
+
+                # LoRA 어댑터 설정 (베이스 공유 시에는 로드 후 런타임에 적용)
+                if lora_path and not shared_base:
                     model_params["lora_path"] = lora_path
 
-                # 모델 로드
+                # 모델 파일 선읽기 후 로드 (model_lock 밖에서 실행)
+                prefetch_model_file(base_model_path)
+                prefetch_model_file(model_params.get("lora_path"))
                 model = Llama(**model_params)
 
+            except Exception as e:
+                print(f"Failed to load model with optimal settings: {e}")
+
+                # Fallback: 최소 설정으로 다시 시도
+                return self._load_fallback_model(base_model_path, lora_path)
+
+            with self.model_lock:
                 # 캐시에 저장
                 self.model_cache[cache_key] = model
+                self.kv_cache_types[cache_key] = kv_quant
+                if v_quant:
+                    self.v_cache_types[cache_key] = v_quant
                 print(f"Model loaded successfully: {cache_key}")
 
-                return model
+                self._apply_lora(cache_key, model, shared_base, activate_lora, lora_path)
 
-            except Exception as e:
-                print(f"Failed to load model with optimal settings: {e}")
+            return model
 
-                # Fallback: 최소 설정으로 다시 시도
-                return self._load_fallback_model(base_model_path, lora_path)
+    def _get_cached_model(self, cache_key: str, shared_base: bool, activate_lora: bool,
+                          lora_path: Optional[str]) -> Optional[Llama]:
+        """캐시된 모델 반환 (없으면 None, model_lock 보유 상태에서 호출)"""
+        model = self.model_cache.get(cache_key)
+        if model is None:
+            return None
+
+        # 추론마다 호출되는 경로이므로 로그를 남기지 않음
+        self._apply_lora(cache_key, model, shared_base, activate_lora, lora_path)
+        return model
+
+    def _apply_lora(self, cache_key: str, model: Llama, shared_base: bool, activate_lora: bool,
+                    lora_path: Optional[str]) -> None:
+        """베이스 공유 시 LoRA 어댑터 교체 (activate_lora=False면 핸들만 미리 로드)"""
+        if not shared_base:
+            return
+        if activate_lora:
+            self._activate_lora(cache_key, model, lora_path)
+        elif lora_path:
+            self._get_lora_adapter(cache_key, model, lora_path)
+
+    def _activate_lora(self, cache_key: str, model: Llama, lora_path: Optional[str]) -> None:
+        """공유 베이스 모델의 활성 LoRA 어댑터 교체 (model_lock 보유 상태에서 호출)"""
+        if cache_key in self.active_loras and self.active_loras[cache_key] == lora_path:
+            return
+
+        _, lora_set, lora_clear = _LORA_API
+        lora_clear(model.ctx)
+
+        if lora_path:
+            adapter = self._get_lora_adapter(cache_key, model, lora_path)
+            if lora_set(model.ctx, adapter, 1.0) != 0:
+                raise RuntimeError(f"Failed to apply LoRA adapter: {lora_path}")
+
+        # 이전 어댑터로 계산된 KV 캐시 접두사를 재사용하지 않도록 초기화
+        model.reset()
+        self.active_loras[cache_key] = lora_path
+        print(f"Active LoRA adapter: {lora_path or 'none'}")
+
+    def _get_lora_adapter(self, cache_key: str, model: Llama, lora_path: str) -> Any:
+        """공유 베이스 모델용 LoRA 어댑터 핸들 반환 (처음 요청 시 로드, model_lock 보유 상태에서 호출)"""
+        adapter = self.lora_adapters.get((cache_key, lora_path))
+        if adapter is None:
+            lora_init = _LORA_API[0]
+            prefetch_model_file(lora_path)
+            adapter = lora_init(model.model, lora_path.encode('utf-8'))
+            if not adapter:
+                raise RuntimeError(f"Failed to load LoRA adapter: {lora_path}")
+            self.lora_adapters[(cache_key, lora_path)] = adapter
+            print(f"LoRA adapter loaded: {lora_path}")
+        return adapter
 
     def _load_fallback_model(self, base_model_path: str, lora_path: Optional[str] = None) -> Llama:
         """Fallback 모델 로딩 (최소 설정)"""
@@ -107,7 +380,7 @@ class OptimizedModelLoader:
                 "n_gpu_layers": 0,
                 "n_threads": 1,
                 "verbose": False,
-                "use_mmap": False,
+                "use_mmap": True,   # GGUF 텐서를 필요할 때 페이지 단위로 로드 (전체 읽기 생략)
                 "use_mlock": False,
             }
 
@@ -128,6 +401,11 @@ class OptimizedModelLoader:
                 except:
                     pass
             self.model_cache.clear()
+            self.kv_cache_types.clear()
+            self.v_cache_types.clear()
+            self.lora_adapters.clear()
+            self.active_loras.clear()
+            self.loading_locks.clear()
             print("Model cache cleared")
 
     def get_cached_models(self) -> list:
@@ -135,6 +413,22 @@ class OptimizedModelLoader:
         with self.model_lock:
             return list(self.model_cache.keys())
 
+    def get_kv_cache_info(self) -> Dict[str, Dict[str, Any]]:
+        """캐시된 모델별 KV 캐시 타입과 추정 메모리 사용량 반환"""
+        with self.model_lock:
+            info = {}
+            for key, model in self.model_cache.items():
+                kv_quant = self.kv_cache_types.get(key, "f16")
+                v_quant = self.v_cache_types.get(key, kv_quant)
+                info[key] = {
+                    "kv_quant": kv_quant,
+                    "v_quant": v_quant,
+                    "active_lora": self.active_loras.get(key),
+                    "n_ctx": model.n_ctx(),
+                    "kv_cache_bytes": estimate_kv_cache_bytes(model, kv_quant, v_quant),
+                }
+            return info
+
 
 # 글로벌 모델 로더 인스턴스
 _global_loader = OptimizedModelLoader()
@@ -154,12 +448,27 @@ def preload_models(base_model_path: str,
 
     print("Pre-loading models...")
 
-    # Exclude 모델 로드
-    if lora_exclude_path:
-        loader.load_model(base_model_path, lora_exclude_path, **kwargs)
+    # 없는 어댑터는 로드 시 조용히 건너뛰지 않고 여기서 바로 실패
+    for lora_path in (lora_exclude_path, lora_sensitive_path):
+        if lora_path:
+            validate_file_exists(lora_path, "LoRA adapter")
 
-    # Sensitive 모델 로드
-    if lora_sensitive_path:
-        loader.load_model(base_model_path, lora_sensitive_path, **kwargs)
+    # 베이스 모델 공유 시: 베이스는 한 번만 로드하고 어댑터 핸들만 준비 (LoRA는 각 분석이
+    # 시작될 때 적용되므로 백그라운드 프리로드가 실행 중인 분석의 어댑터를 바꾸지 않도록 함)
+    if _LORA_API is not None:
+        for lora_path in (lora_exclude_path, lora_sensitive_path):
+            if lora_path:
+                loader.load_model(base_model_path, lora_path, activate_lora=False, **kwargs)
+        print("All models pre-loaded successfully")
+        return
+
+    # Exclude / Sensitive 모델을 병렬로 로드 (캐시 키가 달라 서로 기다리지 않음)
+    lora_paths = [path for path in (lora_exclude_path, lora_sensitive_path) if path]
+    if lora_paths:
+        with ThreadPoolExecutor(max_workers=len(lora_paths)) as executor:
+            futures = [executor.submit(loader.load_model, base_model_path, path, **kwargs)
+                       for path in lora_paths]
+            for future in futures:
+                future.result()
 
     print("All models pre-loaded successfully")
\ No newline at end of file
@@ -7,13 +7,99 @@ utils.py
 공통 유틸리티 함수들
 """
 
+import io
+import mmap
 import os
+import copy
 import json
-import glob
+import queue
+import threading
 import re
-from typing import Dict, Any, List
+import hashlib
+import tempfile
+from typing import Dict, Any, Callable, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 모듈 사용
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick이 없으면 결합 정규식 사용
+    ahocorasick = None
+
+# AST 분석 결과 캐시 디렉토리 (현재 작업 디렉토리 기준)
+AST_CACHE_DIR = ".ast_cache"
+
+# 모델 응답 캐시 디렉토리 (현재 작업 디렉토리 기준)
+COMPLETION_CACHE_DIR = ".llm_cache"
+
+# 메모리에 함께 보관하는 AST JSON / Swift 소스 최대 크기 (넘으면 오래된 항목부터 제거)
+AST_MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+SOURCE_CACHE_BYTES = 64 * 1024 * 1024
+
+# 식별자 검색 시 mmap으로 바로 검사하는 최소 파일 크기
+MMAP_SCAN_MIN_BYTES = 1024 * 1024
+
+# 바이너리 파일 판별 시 NUL 바이트를 찾아볼 앞부분 크기
+BINARY_SNIFF_BYTES = 4096
+
+# 파일 내용 다이제스트 캐시 ((절대 경로, mtime_ns, 크기) -> 다이제스트, 바뀌지 않은 파일은 다시 읽지 않음)
+_digest_cache: Dict[Tuple[str, int, int], bytes] = {}
+
+# Swift 파일 탐색 시 내려가지 않는 디렉토리 (CocoaPods 의존성, Xcode 빌드 산출물)
+# '.'으로 시작하는 디렉토리(.build, .git 등)는 이와 별개로 항상 제외
+SKIPPED_DIR_NAMES = frozenset(('Pods', 'DerivedData'))
+
+# 식별자 매처 캐시 (식별자 집합 -> 매처, 크기를 넘으면 비움)
+MATCHER_CACHE_SIZE = 32
+_matcher_cache: Dict[Tuple[FrozenSet[str], bool], Callable[[Any], bool]] = {}
+
+# 파일명 정리용 정규식 (특수문자 -> 언더스코어, 연속 언더스코어 축약)
+_FILENAME_SPECIAL_CHARS_RE = re.compile(r'[^\w\-_.]')
+_UNDERSCORE_RUN_RE = re.compile(r'_+')
+
+# json.loads가 받아들이는 값의 첫 글자와 단독 리터럴 (그 외 문자열은 파싱 없이 일반 식별자로 처리)
+_JSON_START_CHARS = frozenset('{["-0123456789')
+_JSON_BARE_LITERALS = frozenset(('true', 'false', 'null', 'NaN', 'Infinity'))
+
+# 설정 파일 파싱 결과 캐시 (절대 경로 -> ((mtime_ns, size), 파싱 결과))
+_config_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+# ensure_directory로 생성(확인)된 디렉토리 (반복되는 makedirs 시스템 콜 생략)
+_known_dirs: Set[str] = set()
+_known_dirs_lock = threading.Lock()
+
+
+class SizeBoundedCache:
+    """전체 값 크기(len 합계)가 한도를 넘으면 오래된 항목부터 제거하는 스레드 안전 캐시"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: Dict[Any, Any] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        return self._items.get(key)
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = value
+            self._size += len(value)
+            while self._size > self.max_size and self._items:
+                oldest = next(iter(self._items))
+                self._size -= len(self._items.pop(oldest))
+
+
+_ast_memory_cache = SizeBoundedCache(AST_MEMORY_CACHE_BYTES)
+# Swift 소스 바이트 ((절대 경로, mtime_ns, 크기) -> 내용, 식별자 검색/중복 판별/프롬프트 생성이 같은 읽기를 공유)
+_source_cache = SizeBoundedCache(SOURCE_CACHE_BYTES)
+
 
 def validate_file_exists(file_path: str, description: str = "File") -> None:
     """파일 존재 확인"""
@@ -23,36 +109,141 @@ def validate_file_exists(file_path: str, description: str = "File") -> None:
 
 def load_json_config(config_path: str) -> Dict[str, Any]:
     """JSON 설정 파일 로드"""
-    validate_file_exists(config_path, "Config file")
-
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_config_file(config_path)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"Config file not found: {config_path}") from e
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in config file {config_path}: {e}")
     except Exception as e:
         raise ValueError(f"Failed to load config from {config_path}: {e}")
 
 
+def dumps_json(data: Any, indent: bool = True) -> bytes:
+    """JSON 직렬화 (UTF-8 바이트, orjson 사용 가능 시 orjson 사용)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_json_file(data: Any, output_path: str, indent: bool = True) -> None:
+    """JSON 파일 쓰기"""
+    with open(output_path, 'wb') as f:
+        f.write(dumps_json(data, indent=indent))
+
+
+def loads_json(data: bytes) -> Any:
+    """JSON bytes/str 파싱 (orjson 사용 가능 시 orjson 사용, 실패 시 ValueError 계열 예외)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json_file(file_path: str) -> Any:
+    """JSON 파일 읽기 (orjson 사용 가능 시 orjson 사용)"""
+    with open(file_path, 'rb') as f:
+        content = f.read()
+
+    return loads_json(content)
+
+
+def read_config_file(file_path: str) -> Any:
+    """
+    JSON 설정 파일 읽기 (경로, 수정 시각, 크기가 같으면 이전 파싱 결과 재사용)
+
+    호출자가 결과를 수정해도 캐시에 영향이 없도록 복사본을 반환합니다.
+    """
+    stat = os.stat(file_path)
+    key = os.path.abspath(file_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _config_cache.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, read_json_file(file_path))
+        _config_cache[key] = cached
+
+    return copy.deepcopy(cached[1])
+
+
 def save_json_result(result: Dict[str, Any], output_path: str) -> None:
     """JSON 결과 저장"""
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    ensure_directory(os.path.dirname(output_path))
 
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        write_json_file(result, output_path)
     except Exception as e:
         raise ValueError(f"Failed to save result to {output_path}: {e}")
 
 
+def read_file_bytes(file_path: str) -> bytes:
+    """파일 전체를 바이너리로 읽기 (fstat 크기만큼 한 번에 읽음)"""
+    fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = os.read(fd, remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        # 읽는 도중 파일이 커진 경우 나머지도 읽음
+        while True:
+            chunk = os.read(fd, io.DEFAULT_BUFFER_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+def decode_source(raw: bytes) -> str:
+    """UTF-8 소스 바이트를 텍스트 모드 읽기와 같은 문자열로 디코딩 (개행 정규화 포함)"""
+    text = raw.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _source_key(file_path: str) -> Tuple[str, int, int]:
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+
+def read_source_bytes(file_path: str, key: Optional[Tuple[str, int, int]] = None) -> bytes:
+    """Swift 소스 바이트 읽기 (경로, mtime, 크기가 같으면 메모리에 남아 있는 내용 재사용)"""
+    if key is None:
+        key = _source_key(file_path)
+
+    data = _source_cache.get(key)
+    if data is None:
+        data = read_file_bytes(file_path)
+        _source_cache.put(key, data)
+    return data
+
+
 def get_relative_path(base_path: str, target_path: str) -> str:
     """상대 경로 계산"""
     return os.path.relpath(target_path, base_path)
 
 
 def ensure_directory(dir_path: str) -> None:
-    """디렉토리 생성 (존재하지 않을 경우)"""
+    """디렉토리 생성 (존재하지 않을 경우, 이미 확인한 디렉토리는 다시 확인하지 않음)"""
+    if dir_path in _known_dirs:
+        return
+
     os.makedirs(dir_path, exist_ok=True)
+    with _known_dirs_lock:
+        _known_dirs.add(dir_path)
 
 
 def format_file_size(size_bytes: int) -> str:
@@ -64,10 +255,191 @@ def format_file_size(size_bytes: int) -> str:
     return f"{size_bytes:.1f} TB"
 
 
+def iter_swift_files(project_path: str) -> Iterator[str]:
+    """
+    프로젝트의 Swift 파일 경로를 순회하며 반환 (os.scandir 기반, 목록을 만들지 않음)
+
+    glob("**/*.swift", recursive=True)와 같이 '.'으로 시작하는 숨김 파일/디렉토리는 제외하고,
+    SKIPPED_DIR_NAMES에 해당하는 의존성/빌드 디렉토리 아래로는 내려가지 않습니다.
+    """
+    pending = [project_path]
+
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            if entry.name not in SKIPPED_DIR_NAMES:
+                                pending.append(entry.path)
+                        elif entry.name.endswith('.swift') and entry.is_file():
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def list_swift_files(project_path: str) -> List[str]:
+    """프로젝트의 Swift 파일 경로 목록"""
+    return list(iter_swift_files(project_path))
+
+
+def has_swift_files(project_path: str) -> bool:
+    """프로젝트에 Swift 파일이 하나라도 있는지 확인 (첫 파일을 찾으면 순회 중단)"""
+    return next(iter_swift_files(project_path), None) is not None
+
+
+def build_identifier_matcher(identifiers: List[str], as_bytes: bool = False) -> Callable[[Any], bool]:
+    """
+    대상 식별자 중 하나라도 포함하는지 검사하는 함수 반환
+
+    같은 식별자 집합에 대해서는 이전에 만든 매처(오토마톤/정규식)를 재사용합니다
+    (파일 탐색과 AST 필터가 같은 설정으로 각각 요청).
+    as_bytes=True면 bytes/mmap 같은 버퍼를 검사하는 매처를 반환합니다 (UTF-8로 인코딩한 식별자와 비교).
+    """
+    key = (frozenset(identifiers), as_bytes)
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        if len(_matcher_cache) >= MATCHER_CACHE_SIZE:
+            _matcher_cache.clear()
+        matcher = _compile_identifier_matcher(key[0], as_bytes)
+        _matcher_cache[key] = matcher
+    return matcher
+
+
+def _compile_identifier_matcher(identifiers: FrozenSet[str], as_bytes: bool = False) -> Callable[[Any], bool]:
+    """
+    대상 식별자 중 하나라도 포함하는지 검사하는 함수를 한 번만 만들어 반환
+
+    식별자 규칙 (기존 검색과 동일):
+        - '*'로 끝나면 앞부분(접두사)이 포함되는지 검사
+        - '**'로 시작하면 모든 파일과 일치
+        - 그 외에는 식별자 문자열이 포함되는지 검사
+
+    pyahocorasick이 설치되어 있으면 Aho-Corasick 오토마톤, 없으면 (또는 bytes 검사 시) 결합 정규식으로
+    파일 내용을 한 번만 훑습니다.
+    """
+    needles = set()
+    for identifier in identifiers:
+        if identifier.endswith('*'):
+            needle = identifier[:-1]
+        elif identifier.startswith('**'):
+            needle = ""
+        else:
+            needle = identifier
+
+        if not needle:
+            # 빈 검색어는 모든 내용과 일치
+            return lambda content: True
+        needles.add(needle)
+
+    if not needles:
+        return lambda content: False
+
+    if as_bytes:
+        pattern = re.compile(b"|".join(re.escape(needle.encode('utf-8'))
+                                       for needle in sorted(needles, key=len, reverse=True)))
+        return lambda content: pattern.search(content) is not None
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for needle in needles:
+            automaton.add_word(needle, needle)
+        automaton.make_automaton()
+        return lambda content: next(automaton.iter(content), None) is not None
+
+    # 긴 검색어를 먼저 두어도 결과(포함 여부)는 같지만, 공통 접두사에서의 되돌림이 줄어듦
+    pattern = re.compile("|".join(re.escape(needle) for needle in sorted(needles, key=len, reverse=True)))
+    return lambda content: pattern.search(content) is not None
+
+
+def _looks_binary(data) -> bool:
+    """앞부분(BINARY_SNIFF_BYTES)에 NUL 바이트가 있으면 바이너리로 판단 (bytes/mmap 모두 복사 없이 검사)"""
+    return data.find(b'\x00', 0, BINARY_SNIFF_BYTES) != -1
+
+
+def _mmap_contains(file_path: str, contains_identifier: Callable[[Any], bool]) -> Optional[bool]:
+    """mmap 위에서 식별자 검색 (바이너리 파일이면 None)"""
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if _looks_binary(mapped):
+            return None
+        return contains_identifier(mapped)
+
+
+def scan_files_for_identifiers(swift_files: List[str], identifiers: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    대상 식별자를 포함한 Swift 파일 목록과 읽기 실패 경고 메시지 반환
+
+    프로세스 풀 작업 함수로도 쓰이므로 모듈 최상위 함수로 두고, 매처는 각 프로세스에서 만듭니다.
+    앞부분에 NUL 바이트가 있는 파일은 바이너리로 보고 디코딩/검색 없이 건너뜁니다.
+    """
+    contains_identifier = build_identifier_matcher(identifiers)
+    matching_files = []
+    warnings = []
+
+    for swift_file in swift_files:
+        try:
+            key = _source_key(swift_file)
+            if key[2] >= MMAP_SCAN_MIN_BYTES and _source_cache.get(key) is None:
+                # 큰 파일(생성된 코드 등)은 문자열로 복사/디코딩하지 않고 mmap 위에서 바로 검색
+                matched = _mmap_contains(swift_file, build_identifier_matcher(identifiers, as_bytes=True))
+            else:
+                source = read_source_bytes(swift_file, key)
+                matched = None if _looks_binary(source) else contains_identifier(decode_source(source))
+
+            if matched is None:
+                warnings.append(f"Warning: Skipping binary file {swift_file}")
+            elif matched:
+                matching_files.append(swift_file)
+
+        except (UnicodeDecodeError, OSError) as e:
+            warnings.append(f"Warning: Could not read {swift_file}: {e}")
+
+    return matching_files, warnings
+
+
+def ast_references_identifiers(ast_json: str, contains_identifier: Callable[[str], bool]) -> bool:
+    """
+    AST JSON의 심볼 이름/참조(symbolName, references) 중 대상 식별자와 일치하는 것이 있는지 확인
+
+    심볼 정보를 찾을 수 없는 형식이면 판단할 수 없으므로 True를 반환합니다.
+    """
+    try:
+        data = loads_json(ast_json)
+    except ValueError:
+        return True
+
+    names: List[str] = []
+    found_symbol_info = False
+    # (노드, symbolName/references 값의 하위인지 여부)
+    pending = [(data, False)]
+
+    while pending:
+        node, in_symbol = pending.pop()
+        if isinstance(node, str):
+            if in_symbol:
+                names.append(node)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                is_symbol_key = key in ('symbolName', 'references')
+                found_symbol_info = found_symbol_info or is_symbol_key
+                pending.append((value, in_symbol or is_symbol_key))
+        elif isinstance(node, list):
+            pending.extend((item, in_symbol) for item in node)
+
+    if not found_symbol_info:
+        return True
+
+    return contains_identifier("\n".join(names))
+
+
 def get_swift_files_count(project_path: str) -> int:
     """프로젝트의 Swift 파일 개수 반환"""
-    swift_files = glob.glob(os.path.join(project_path, "**/*.swift"), recursive=True)
-    return len(swift_files)
+    return sum(1 for _ in iter_swift_files(project_path))
 
 
 def get_file_info(file_path: str) -> Dict[str, Any]:
@@ -100,19 +472,20 @@ def create_output_directory(base_dir: str, mode: str, config_name: str = None) -
 def sanitize_filename(filename: str) -> str:
     """파일명에서 특수문자 제거"""
     # 특수문자를 언더스코어로 변경
-    sanitized = re.sub(r'[^\w\-_.]', '_', filename)
+    sanitized = _FILENAME_SPECIAL_CHARS_RE.sub('_', filename)
     # 연속된 언더스코어를 하나로 변경
-    sanitized = re.sub(r'_+', '_', sanitized)
+    sanitized = _UNDERSCORE_RUN_RE.sub('_', sanitized)
     return sanitized
 
 
 def merge_identifiers(results: List[Dict[str, Any]]) -> List[str]:
     """여러 결과에서 식별자들을 병합하고 중복 제거"""
-    all_identifiers = []
+    merged = set()
     for result in results:
-        if 'identifiers' in result and isinstance(result['identifiers'], list):
-            all_identifiers.extend(result['identifiers'])
-    return list(set(all_identifiers))
+        identifiers = result.get('identifiers')
+        if isinstance(identifiers, list):
+            merged.update(identifiers)
+    return list(merged)
 
 
 def filter_valid_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -154,11 +527,20 @@ def extract_function_name(identifier_string: str) -> str:
         return identifier_string
 
     # "functionName(param1: Type, param2: Type) -> ReturnType" -> "functionName"
-    if '(' in identifier_string:
-        return identifier_string.split('(')[0].strip()
+    paren = identifier_string.find('(')
+    if paren >= 0:
+        return identifier_string[:paren].strip()
     return identifier_string.strip()
 
 
+def _may_be_json(text: str) -> bool:
+    """json.loads가 성공할 수 있는 형태의 문자열인지 첫 글자로 빠르게 판별"""
+    stripped = text.strip()
+    if not stripped:
+        return False
+    return stripped[0] in _JSON_START_CHARS or stripped in _JSON_BARE_LITERALS
+
+
 def extract_symbol_names_from_exclude_result(result: Dict[str, Any]) -> List[str]:
     """Exclude 결과에서 symbol_name만 추출"""
     symbol_names = []
@@ -167,7 +549,12 @@ def extract_symbol_names_from_exclude_result(result: Dict[str, Any]) -> List[str
         return symbol_names
 
     for identifier in result['identifiers']:
-        if isinstance(identifier, str):
+        if isinstance(identifier, str) and not _may_be_json(identifier):
+            # 일반 식별자 문자열 (JSON 파싱 생략)
+            symbol_name = extract_function_name(identifier)
+            if symbol_name:
+                symbol_names.append(symbol_name)
+        elif isinstance(identifier, str):
             # JSON 문자열인 경우 파싱 시도
             try:
                 parsed = json.loads(identifier)
@@ -217,23 +604,206 @@ def extract_sensitive_identifiers(result: Dict[str, Any]) -> List[str]:
 def save_identifiers_to_txt(identifiers: List[str], output_path: str) -> None:
     """식별자 목록을 텍스트 파일로 저장"""
     # 출력 디렉토리 생성
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    ensure_directory(os.path.dirname(output_path))
 
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for identifier in identifiers:
-                f.write(f"{identifier}\n")
+        with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            if identifiers:
+                f.write('\n'.join(map(str, identifiers)))
+                f.write('\n')
     except Exception as e:
         raise ValueError(f"Failed to save identifiers to {output_path}: {e}")
 
 
-def clean_and_deduplicate_identifiers(identifiers: List[str]) -> List[str]:
-    """식별자 목록을 정리하고 중복 제거 후 정렬"""
-    cleaned = []
+def clean_and_deduplicate_identifiers(identifiers: Iterable[str], sort: bool = True) -> List[str]:
+    """
+    식별자 목록을 정리하고 중복 제거 후 정렬
+
+    처음 등장한 순서를 유지하며 중복을 제거하므로 (거의 정렬된 입력이면 정렬이 빠름)
+    sort=False면 그 순서 그대로 반환합니다.
+    """
+    cleaned: Dict[str, None] = {}
     for identifier in identifiers:
         clean_id = extract_function_name(str(identifier))
         if clean_id:  # 빈 문자열 제외
-            cleaned.append(clean_id)
+            cleaned[clean_id] = None
+
+    if not sort:
+        return list(cleaned)
+    return sorted(cleaned)
+
+
+def bytes_digest(data: bytes) -> bytes:
+    """바이트의 BLAKE2b 다이제스트 (중복 제거와 AST 캐시 키에 공통 사용)"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def content_digest(file_path: str) -> bytes:
+    """파일 내용의 BLAKE2b 다이제스트 (경로, mtime, 크기가 같으면 이전 결과 재사용)"""
+    key = _source_key(file_path)
+
+    digest = _digest_cache.get(key)
+    if digest is None:
+        digest = bytes_digest(read_source_bytes(file_path, key))
+        _digest_cache[key] = digest
+    return digest
+
+
+def extract_ast_json(output: bytes) -> Optional[str]:
+    """
+    AST 분석기 stdout(bytes)에서 JSON 부분만 추출 (유효하지 않으면 None)
+
+    검증은 bytes 상태에서 수행하고 (orjson 사용 가능 시 orjson), 문자열 디코딩은 마지막에 한 번만 합니다.
+    AST 캐시에 넣는 값은 모두 이 함수를 거쳐야 합니다 (캐시 적중 시에는 다시 검증하지 않음).
+    """
+    first_bracket = output.find(b'[')
+    first_brace = output.find(b'{')
+
+    if first_bracket == -1 and first_brace == -1:
+        return None
+
+    if first_bracket != -1 and (first_bracket < first_brace or first_brace == -1):
+        json_start = first_bracket
+    else:
+        json_start = first_brace
 
-    # 중복 제거 및 정렬
-    return sorted(list(set(cleaned)))
\ No newline at end of file
+    json_part = output[json_start:].rstrip()
+
+    try:
+        loads_json(json_part)
+        return json_part.decode('utf-8')
+    except ValueError:
+        return None
+
+
+def ast_cache_key(swift_file_path: str, analyzer_path: str, digest: Optional[bytes] = None) -> Optional[str]:
+    """
+    Swift 파일 내용과 AST 분석기 실행파일을 기준으로 캐시 키 생성
+
+    digest가 주어지면 (이미 계산한 content_digest 결과) 파일을 다시 읽지 않습니다.
+    """
+    try:
+        if digest is None:
+            digest = content_digest(swift_file_path)
+        analyzer_stat = os.stat(analyzer_path)
+    except OSError:
+        return None
+
+    hasher = hashlib.blake2b(digest, digest_size=16)
+    # 분석기가 교체되면 이전 결과를 재사용하지 않도록 분석기 정보도 키에 포함
+    # (모드별 분석기가 같은 캐시 디렉토리를 쓰므로 크기/수정 시각이 같아도 섞이지 않게 실제 경로도 포함)
+    hasher.update(f"{os.path.realpath(analyzer_path)}:{analyzer_stat.st_size}:{analyzer_stat.st_mtime_ns}".encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def ast_cache_get(cache_key: str) -> Optional[str]:
+    """캐시된 AST JSON 반환 (메모리 -> 디스크 순으로 확인, 없으면 None)"""
+    ast_json = _ast_memory_cache.get(cache_key)
+    if ast_json is not None:
+        return ast_json
+
+    try:
+        with open(os.path.join(AST_CACHE_DIR, f"{cache_key}.json"), 'r', encoding='utf-8') as f:
+            ast_json = f.read()
+    except OSError:
+        return None
+
+    _ast_memory_cache.put(cache_key, ast_json)
+    return ast_json
+
+
+def ast_cache_put(cache_key: str, ast_json: str) -> None:
+    """AST JSON을 캐시에 원자적으로 저장"""
+    _ast_memory_cache.put(cache_key, ast_json)
+    try:
+        _write_cache_file(AST_CACHE_DIR, cache_key, ast_json)
+    except OSError as e:
+        print(f"Warning: Failed to write AST cache: {e}")
+
+
+def completion_cache_key(model_files: Iterable[Optional[str]], *parts: str) -> Optional[str]:
+    """
+    모델 파일(베이스 모델, LoRA)과 프롬프트/생성 설정을 기준으로 모델 응답 캐시 키 생성
+
+    모델 파일이 교체되면 이전 응답을 재사용하지 않도록 파일 크기/수정 시각도 키에 포함합니다.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    try:
+        for path in model_files:
+            if path:
+                stat = os.stat(path)
+                hasher.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+            hasher.update(b'\x1f')
+    except OSError:
+        return None
+
+    for part in parts:
+        hasher.update(part.encode('utf-8', errors='surrogatepass'))
+        hasher.update(b'\x1f')
+    return hasher.hexdigest()
+
+
+def completion_cache_get(cache_key: str) -> Optional[str]:
+    """캐시된 모델 응답 반환 (없으면 None)"""
+    try:
+        with open(os.path.join(COMPLETION_CACHE_DIR, f"{cache_key}.txt"), 'r', encoding='utf-8') as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def completion_cache_put(cache_key: str, raw_output: str) -> None:
+    """모델 응답을 캐시에 원자적으로 저장"""
+    try:
+        _write_cache_file(COMPLETION_CACHE_DIR, cache_key, raw_output, ".txt")
+    except (OSError, UnicodeEncodeError) as e:
+        print(f"Warning: Failed to write completion cache: {e}")
+
+
+def _write_cache_file(cache_dir: str, cache_key: str, text: str, suffix: str = ".json") -> None:
+    """캐시 파일을 임시 파일에 쓴 뒤 교체 (동시에 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)"""
+    ensure_directory(cache_dir)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    except FileNotFoundError:
+        # 실행 중에 캐시 디렉토리가 삭제된 경우 (ensure_directory는 한 번 확인한 디렉토리를 기억함)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{cache_key}{suffix}"))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class JsonLinesWriter:
+    """결과 딕셔너리를 한 파일에 한 줄씩(JSONL) 기록하는 백그라운드 라이터
+
+    파일은 한 번만 열어 두고, 직렬화(들여쓰기 없는 압축 형식)와 쓰기는 전용 스레드에서 처리합니다.
+    """
+
+    def __init__(self, output_path: str):
+        ensure_directory(os.path.dirname(output_path) or '.')
+        self._file = open(output_path, 'wb', buffering=1 << 20)
+        self._queue: "queue.Queue[Optional[Any]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._drain_queue, daemon=True)
+        self._thread.start()
+
+    def write_json(self, data: Any) -> None:
+        """한 줄로 기록할 결과를 큐에 추가 (이후 data를 수정하지 말 것)"""
+        self._queue.put(data)
+
+    def close(self) -> None:
+        """대기 중인 쓰기를 모두 마치고 파일을 닫음"""
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _drain_queue(self) -> None:
+        while (data := self._queue.get()) is not None:
+            try:
+                self._file.write(dumps_json(data, indent=False) + b'\n')
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Warning: Failed to write result to {self._file.name}: {e}")
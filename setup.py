@@ -9,11 +9,12 @@ setup(
     author_email="ark182818@gmail.com",
     packages=find_packages(),
     install_requires=[
-        "llama-cpp-python>=0.2.20",
+        "llama-cpp-python>=0.2.62",
     ],
     extras_require={
-        "cuda": ["llama-cpp-python[cuda]>=0.2.20"],
-        "metal": ["llama-cpp-python[metal]>=0.2.20"],
+        "cuda": ["llama-cpp-python[cuda]>=0.2.62"],
+        "metal": ["llama-cpp-python[metal]>=0.2.62"],
+        "fast": ["orjson>=3.6", "pyahocorasick>=2.0"],
     },
     python_requires=">=3.8",
     entry_points={